@@ -0,0 +1,21 @@
+import os
+
+
+def _has_gpu():
+    try:
+        import cupy
+
+        return cupy.cuda.runtime.getDeviceCount() > 0
+    except Exception:
+        return False
+
+
+# Without a GPU (or with CUPY_XARRAY_BENCH_STAND_IN=1) run against a
+# NumPy-backed stand-in for cupy, so that regressions in the Python
+# overhead of the conversion paths are still caught.
+STAND_IN = os.environ.get("CUPY_XARRAY_BENCH_STAND_IN") == "1" or not _has_gpu()
+
+if STAND_IN:
+    from . import _stand_in
+
+    _stand_in.install()
@@ -0,0 +1,115 @@
+"""
+NumPy-backed stand-in for the parts of cupy used by cupy-xarray.
+
+Lets the benchmarks run on machines without a GPU. "Device" arrays are a
+numpy ndarray subclass and every host/device transfer is a host memcpy, so
+timings measure the Python overhead of the conversion paths plus a copy,
+not real transfer bandwidth.
+"""
+
+import sys
+import types
+
+import numpy as np
+
+
+class ndarray(np.ndarray):
+    def get(self, stream=None, out=None, blocking=True):
+        host = self.view(np.ndarray)
+        if out is None:
+            return host.copy()
+        np.copyto(out, host)
+        return out
+
+    def set(self, arr, stream=None):
+        np.copyto(self.view(np.ndarray), arr)
+
+
+def empty(shape, dtype=float, order="C"):
+    return np.empty(shape, dtype=dtype, order=order).view(ndarray)
+
+
+def asarray(a, dtype=None, order=None):
+    if isinstance(a, ndarray) and (dtype is None or a.dtype == dtype):
+        return a
+    return np.array(a, dtype=dtype, order=order, copy=True).view(ndarray)
+
+
+def from_dlpack(x):
+    return np.from_dlpack(x).view(ndarray)
+
+
+class _MemoryPool:
+    def free_bytes(self):
+        return 0
+
+
+_memory_pool = _MemoryPool()
+
+
+def get_default_memory_pool():
+    return _memory_pool
+
+
+class _Device:
+    # large enough that the memory budget never kicks in by accident
+    mem_info = (2**40, 2**40)
+
+    def __init__(self, device=None):
+        self.id = 0 if device is None else device
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def synchronize(self):
+        pass
+
+
+class _Stream(_Device):
+    def __init__(self, null=False, non_blocking=False, ptds=False):
+        pass
+
+
+class _PinnedMemory:
+    def __init__(self, size):
+        self.size = size
+
+
+class _PinnedMemoryPointer(bytearray):
+    def __init__(self, mem, offset):
+        super().__init__(mem.size - offset)
+        self.mem = mem
+
+    def size(self):
+        # a method, as in cupy, unlike PinnedMemory.size
+        return len(self)
+
+
+def _empty_pinned(shape, dtype=float, order="C"):
+    return np.empty(shape, dtype=dtype, order=order)
+
+
+def install():
+    """Register the stand-in as the ``cupy`` and ``cupyx`` modules."""
+    cupy = types.ModuleType("cupy")
+    cupy.ndarray = ndarray
+    cupy.empty = empty
+    cupy.asarray = asarray
+    cupy.from_dlpack = from_dlpack
+    cupy.copyto = np.copyto
+    cupy.uint8 = np.uint8
+    cupy.get_default_memory_pool = get_default_memory_pool
+    cupy.cuda = types.SimpleNamespace(
+        Device=_Device,
+        Stream=_Stream,
+        PinnedMemory=_PinnedMemory,
+        PinnedMemoryPointer=_PinnedMemoryPointer,
+        runtime=types.SimpleNamespace(getDeviceCount=lambda: 1),
+    )
+    cupyx = types.ModuleType("cupyx")
+    cupyx.empty_pinned = _empty_pinned
+    sys.modules["cupy"] = cupy
+    sys.modules["cupyx"] = cupyx
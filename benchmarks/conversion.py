@@ -0,0 +1,151 @@
+import numpy as np
+import xarray as xr
+
+import cupy_xarray  # noqa: F401
+
+from . import STAND_IN
+
+try:
+    import dask  # noqa: F401
+except ImportError:
+    dask = None
+
+# elements per array
+SIZES = [2**10, 2**16, 2**22]
+DTYPES = ["float32", "float64", "int16"]
+LAYOUTS = ["C", "F", "strided"]
+
+
+def _host_array(size, dtype, layout="C"):
+    shape = (max(size // 256, 1), 256)
+    if layout == "strided":
+        return np.ones((shape[0], 2 * shape[1]), dtype=dtype)[:, ::2]
+    return np.ones(shape, dtype=dtype, order=layout)
+
+
+def _dataarray(size, dtype="float64", layout="C", name="var"):
+    data = _host_array(size, dtype, layout)
+    return xr.DataArray(
+        data,
+        dims=("y", "x"),
+        coords={"y": np.arange(data.shape[0]), "x": np.arange(data.shape[1])},
+        name=name,
+    )
+
+
+def _dataset(n_vars, size):
+    return xr.Dataset({f"var{i}": _dataarray(size, name=f"var{i}") for i in range(n_vars)})
+
+
+class DataArrayConversion:
+    params = [SIZES, DTYPES, LAYOUTS]
+    param_names = ["size", "dtype", "layout"]
+
+    def setup(self, size, dtype, layout):
+        self.da = _dataarray(size, dtype, layout)
+        self.gda = self.da.cupy.as_cupy()
+
+    def time_as_cupy(self, size, dtype, layout):
+        self.da.cupy.as_cupy()
+
+    def time_as_cupy_pinned(self, size, dtype, layout):
+        self.da.cupy.as_cupy(pinned=True)
+
+    def time_as_numpy(self, size, dtype, layout):
+        self.gda.cupy.as_numpy()
+
+    def time_get(self, size, dtype, layout):
+        self.gda.cupy.get()
+
+    def time_get_reuse(self, size, dtype, layout):
+        self.gda.cupy.get(reuse=True)
+
+    def time_is_cupy(self, size, dtype, layout):
+        return self.gda.cupy.is_cupy
+
+
+class DaskDataArrayConversion:
+    params = [SIZES, [1, 16, 256]]
+    param_names = ["size", "n_chunks"]
+
+    def setup(self, size, n_chunks):
+        if dask is None:
+            raise NotImplementedError("dask is not installed")
+        da = _dataarray(size)
+        self.da = da.chunk(y=max(da.sizes["y"] // n_chunks, 1))
+        self.gda = self.da.cupy.as_cupy()
+
+    def time_as_cupy(self, size, n_chunks):
+        self.da.cupy.as_cupy()
+
+    def time_as_cupy_compute(self, size, n_chunks):
+        self.da.cupy.as_cupy().compute()
+
+    def time_as_numpy(self, size, n_chunks):
+        self.gda.cupy.as_numpy()
+
+    def time_as_numpy_compute(self, size, n_chunks):
+        self.gda.cupy.as_numpy().compute()
+
+    def time_sum_as_cupy(self, size, n_chunks):
+        self.da.cupy.as_cupy().sum().compute()
+
+    def time_sum_iter_chunks(self, size, n_chunks):
+        return sum(float(chunk.sum()) for _, chunk in self.da.cupy.iter_chunks())
+
+    def time_is_cupy(self, size, n_chunks):
+        return self.gda.cupy.is_cupy
+
+
+class DatasetConversion:
+    params = [[1, 10, 100], [2**10, 2**16], ["default", "streams", "pack"]]
+    param_names = ["n_vars", "size", "method"]
+
+    def setup(self, n_vars, size, method):
+        self.ds = _dataset(n_vars, size)
+        self.gds = self.ds.cupy.as_cupy()
+        self.kwargs = {
+            "default": {},
+            "streams": {"streams": 4},
+            "pack": {"pack_threshold": size * 8},
+        }[method]
+
+    def time_as_cupy(self, n_vars, size, method):
+        self.ds.cupy.as_cupy(**self.kwargs)
+
+    def time_as_numpy(self, n_vars, size, method):
+        if method == "pack":
+            self.gds.cupy.as_numpy(pack_threshold=size * 8)
+        else:
+            self.gds.cupy.as_numpy()
+
+    def time_is_cupy(self, n_vars, size, method):
+        return self.gds.cupy.is_cupy
+
+
+class DaskDatasetConversion:
+    params = [[1, 10, 100], [2**16]]
+    param_names = ["n_vars", "size"]
+
+    def setup(self, n_vars, size):
+        if dask is None:
+            raise NotImplementedError("dask is not installed")
+        self.ds = _dataset(n_vars, size).chunk(y=16)
+        self.gds = self.ds.cupy.as_cupy()
+
+    def time_as_cupy(self, n_vars, size):
+        self.ds.cupy.as_cupy()
+
+    def time_as_cupy_compute(self, n_vars, size):
+        self.ds.cupy.as_cupy().compute()
+
+    def time_as_numpy_compute(self, n_vars, size):
+        self.gds.cupy.as_numpy().compute()
+
+    def time_is_cupy(self, n_vars, size):
+        return self.gds.cupy.is_cupy
+
+
+def track_stand_in():
+    """Whether these results were measured against the NumPy stand-in for cupy."""
+    return int(STAND_IN)
@@ -0,0 +1,23 @@
+class ImportTime:
+    """Startup cost of cupy-xarray, measured in a fresh interpreter."""
+
+    def timeraw_import_cupy_xarray(self):
+        return "import cupy_xarray"
+
+    def timeraw_import_cupy_xarray_after_xarray(self):
+        # the part of the import time that cupy-xarray adds on top of xarray
+        return "import cupy_xarray", "import xarray"
+
+    def track_modules_imported(self):
+        """Number of cupy, cupyx and dask modules loaded by ``import cupy_xarray``."""
+        import subprocess
+        import sys
+
+        code = (
+            "import sys, cupy_xarray; "
+            "print(sum(m.split('.')[0] in ('cupy', 'cupyx', 'dask') for m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        return int(result.stdout)
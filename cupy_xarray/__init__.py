@@ -1,4 +1,7 @@
-from . import _version
+from . import _version, telemetry  # noqa
+from ._cache import clear_conversion_cache  # noqa
+from ._spill import restore_allocator  # noqa
 from .accessors import CupyDataArrayAccessor, CupyDatasetAccessor  # noqa
+from .options import set_options  # noqa
 
 __version__ = _version.get_versions()["version"]
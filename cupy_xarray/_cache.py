@@ -0,0 +1,143 @@
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+from ._compat import cp
+from .options import OPTIONS
+
+
+class DeviceArrayCache:
+    """
+    Device copies of host arrays, keyed by the identity of the host buffer.
+
+    An entry is found again for the same memory viewed with the same shape,
+    strides and dtype, converted to the same dtype on the same device. It is
+    dropped as soon as the host array it was made from is garbage collected,
+    so a new array that happens to reuse the freed memory never gets a stale
+    copy. Entries are evicted least-recently-used first once their total
+    size exceeds ``max_bytes``.
+
+    Host arrays are made read-only for as long as their entry lives, so that
+    writing to them raises instead of leaving a stale copy in the cache. They
+    become writeable again once the entry is evicted or cleared. Writes
+    through other views of the same memory are not detected.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Upper bound on the device bytes held by cached arrays. Defaults to the
+        ``conversion_cache_size`` option.
+    """
+
+    def __init__(self, max_bytes=None):
+        self._max_bytes = max_bytes
+        # key -> (device array, finalizer of the host array, weakref to it)
+        self._entries = OrderedDict()
+        # id of host arrays made read-only -> number of entries made from them
+        self._read_only = {}
+        # finalizers may run from garbage collection while the lock is held
+        self._lock = threading.RLock()
+
+    @property
+    def max_bytes(self):
+        if self._max_bytes is None:
+            return OPTIONS["conversion_cache_size"]
+        return self._max_bytes
+
+    @property
+    def cached_bytes(self):
+        """Number of device bytes held by cached arrays."""
+        with self._lock:
+            return sum(device.nbytes for device, *_ in self._entries.values())
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _key(array, dtype):
+        pointer = array.__array_interface__["data"][0]
+        dtype = array.dtype if dtype is None else np.dtype(dtype)
+        return (pointer, array.shape, array.strides, array.dtype, dtype, cp.cuda.Device().id)
+
+    def get(self, array, dtype=None):
+        """Return the cached device copy of numpy ``array``, or None."""
+        key = self._key(array, dtype)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, array, device, dtype=None):
+        """Cache ``device``, the copy of numpy ``array`` converted to ``dtype``."""
+        if device.nbytes > self.max_bytes:
+            return
+        key = self._key(array, dtype)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._release(old)
+            if id(array) in self._read_only:
+                self._read_only[id(array)] += 1
+            elif array.flags.writeable:
+                array.flags.writeable = False
+                self._read_only[id(array)] = 1
+            finalizer = weakref.finalize(array, self._discard, key, id(array))
+            self._entries[key] = (device, finalizer, weakref.ref(array))
+            total = self.cached_bytes
+            while total > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._release(evicted)
+                total -= evicted[0].nbytes
+
+    def _release(self, entry):
+        """Forget the host array of a dropped entry, making it writeable again if needed."""
+        _, finalizer, ref = entry
+        finalizer.detach()
+        array = ref()
+        if array is not None and self._unlock(id(array)):
+            array.flags.writeable = True
+
+    def _unlock(self, array_id):
+        """Count down the entries of a read-only host array, returning True at the last."""
+        count = self._read_only.get(array_id)
+        if count is None:
+            return False
+        if count > 1:
+            self._read_only[array_id] = count - 1
+            return False
+        del self._read_only[array_id]
+        return True
+
+    def _discard(self, key, array_id):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._unlock(array_id)
+
+    def clear(self):
+        """Drop all cached device arrays."""
+        with self._lock:
+            for entry in self._entries.values():
+                self._release(entry)
+            self._entries.clear()
+
+
+_conversion_cache = DeviceArrayCache()
+
+
+def conversion_cache():
+    """Return the cache used by ``as_cupy(cache=True)``."""
+    return _conversion_cache
+
+
+def clear_conversion_cache():
+    """
+    Drop all device arrays cached by ``as_cupy(cache=True)``.
+
+    Cached host arrays are read-only while cached; this makes them writeable
+    again.
+    """
+    _conversion_cache.clear()
@@ -0,0 +1,61 @@
+import importlib
+import sys
+
+_CUPY_MISSING = (
+    "Cupy is not installed. cupy-xarray expects cupy to be manually installed. Please install "
+    "cupy by following the instructions at https://docs.cupy.dev/en/stable/install.html."
+)
+
+
+class LazyModule:
+    """
+    Placeholder for a module that is only imported on first attribute access.
+
+    Importing cupy initializes CUDA and takes seconds, so cupy-xarray defers
+    it until data is actually moved. Looked up attributes are cached on the
+    placeholder, which keeps later accesses as cheap as on the module itself.
+    """
+
+    def __init__(self, name, missing_message=None):
+        self.__dict__["_name"] = name
+        self.__dict__["_missing_message"] = missing_message
+
+    def __getattr__(self, attr):
+        try:
+            module = importlib.import_module(self._name)
+        except ImportError as e:
+            if self._missing_message is None:
+                raise
+            raise ImportError(self._missing_message) from e
+        value = getattr(module, attr)
+        self.__dict__[attr] = value
+        return value
+
+    def __repr__(self):
+        return f"<lazily imported module {self._name!r}>"
+
+
+cp = LazyModule("cupy", _CUPY_MISSING)
+cupyx = LazyModule("cupyx", _CUPY_MISSING)
+
+
+# Type checks that never trigger an import: if a module has not been imported
+# yet, no object can be an instance of its array type.
+
+
+def is_cupy_array(obj):
+    """Whether ``obj`` is a cupy ndarray, without importing cupy."""
+    cupy = sys.modules.get("cupy")
+    return cupy is not None and isinstance(obj, cupy.ndarray)
+
+
+def is_dask_array(obj):
+    """Whether ``obj`` is a dask array, without importing dask."""
+    dask_array = sys.modules.get("dask.array")
+    return dask_array is not None and isinstance(obj, dask_array.Array)
+
+
+def is_sparse_array(obj):
+    """Whether ``obj`` is a pydata/sparse array, without importing sparse."""
+    sparse = sys.modules.get("sparse")
+    return sparse is not None and isinstance(obj, sparse.SparseArray)
@@ -0,0 +1,45 @@
+import threading
+from collections import OrderedDict
+
+# number of recent conversions remembered for cancellation
+_MAX_CONVERSIONS = 4096
+
+_conversions = OrderedDict()
+_lock = threading.Lock()
+
+
+def record_conversion(converted, source, direction):
+    """
+    Remember that dask array ``converted`` is ``source`` moved in ``direction``.
+
+    Only the names and meta of the arrays are kept, so recording a conversion
+    never keeps its graph alive.
+    """
+    with _lock:
+        _conversions[converted.name] = (direction, source.name, source._meta)
+        _conversions.move_to_end(converted.name)
+        while len(_conversions) > _MAX_CONVERSIONS:
+            _conversions.popitem(last=False)
+
+
+def cancel_round_trip(array, direction):
+    """
+    Undo a conversion instead of stacking its inverse on top of it.
+
+    If dask array ``array`` is the direct output of a conversion in the
+    opposite ``direction``, return the array that conversion started from,
+    rebuilt from ``array``'s own graph with the conversion layer culled.
+    Otherwise, or if the source is no longer part of that graph, return None.
+    """
+    import dask.array
+
+    with _lock:
+        entry = _conversions.get(array.name)
+    if entry is None or entry[0] == direction:
+        return None
+    _, source_name, meta = entry
+    if source_name not in array.dask.layers:
+        # persisting keeps the name but replaces the graph with the results
+        return None
+    graph = array.dask.cull_layers([source_name])
+    return dask.array.Array(graph, source_name, array.chunks, meta=meta)
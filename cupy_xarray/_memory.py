@@ -0,0 +1,167 @@
+import math
+from collections.abc import Mapping
+
+import numpy as np
+from xarray import DataArray
+
+from ._compat import cp
+from ._transfer import is_device_array
+from .options import OPTIONS
+
+
+def memory_budget():
+    """
+    Number of bytes of device memory conversions may use.
+
+    The ``device_memory_budget`` option if set, otherwise the memory currently
+    free on the device plus the free blocks cached by cupy's memory pool.
+    """
+    budget = OPTIONS["device_memory_budget"]
+    if budget is None:
+        free, _ = cp.cuda.Device().mem_info
+        return free + cp.get_default_memory_pool().free_bytes()
+    return budget
+
+
+def _itemsize(da, dtype):
+    """Item size of ``da`` on the device, once converted to ``dtype`` if given."""
+    if isinstance(dtype, Mapping):
+        dtype = dtype.get(da.name)
+    return (da.dtype if dtype is None else np.dtype(dtype)).itemsize
+
+
+def _largest_chunk_nbytes(da, itemsize):
+    return math.prod(max(sizes, default=0) for sizes in da.chunks) * itemsize
+
+
+def device_footprint(obj, dtype=None):
+    """
+    Estimate the device memory needed to move ``obj`` to the GPU.
+
+    Data held in memory is resident all at once, while dask-backed data only
+    ever needs its largest chunk at a time. ``dtype`` is the dtype the data
+    is converted to, or a mapping of data variable names to dtypes.
+    """
+    arrays = [obj] if isinstance(obj, DataArray) else list(obj.data_vars.values())
+    # data that is already on the device is wrapped rather than copied
+    arrays = [da for da in arrays if not (da.cupy.is_cupy or is_device_array(da.variable._data))]
+    eager = sum(da.size * _itemsize(da, dtype) for da in arrays if da.chunks is None)
+    chunked = max(
+        (_largest_chunk_nbytes(da, _itemsize(da, dtype)) for da in arrays if da.chunks),
+        default=0,
+    )
+    return eager + chunked
+
+
+def _format_bytes(nbytes):
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if nbytes < 1024:
+            return f"{nbytes:.2f} {unit}"
+        nbytes /= 1024
+    return f"{nbytes:.2f} TiB"
+
+
+def fit_to_budget(obj, over_budget, dtype=None):
+    """
+    Check that a DataArray or Dataset fits the device memory budget.
+
+    Parameters
+    ----------
+    obj : DataArray or Dataset
+        Object about to be moved to the GPU.
+    over_budget : {"raise", "chunk", "ignore"}
+        What to do if the estimated footprint exceeds the budget: raise a
+        ``MemoryError`` before any data is transferred, rechunk with dask into
+        chunks sized to fit, or go ahead regardless.
+    dtype : dtype or mapping of hashable to dtype, optional
+        Dtype the data is converted to on the way to the GPU, or a mapping of
+        data variable names to dtypes.
+
+    Returns
+    -------
+    obj : DataArray or Dataset
+        ``obj`` itself, or a rechunked copy.
+    """
+    if over_budget == "ignore":
+        return obj
+    budget = memory_budget()
+    footprint = device_footprint(obj, dtype)
+    if footprint <= budget:
+        return obj
+    if over_budget == "raise":
+        raise MemoryError(
+            f"Moving this {type(obj).__name__} to the GPU needs an estimated "
+            f"{_format_bytes(footprint)} of device memory, but the budget is "
+            f"{_format_bytes(budget)}. Use over_budget='chunk' to split it into dask "
+            "chunks that fit, or raise the `device_memory_budget` option."
+        )
+
+    import dask
+    from dask.utils import parse_bytes
+
+    # leave room on the device for a few chunks and their intermediates
+    limit = min(parse_bytes(dask.config.get("array.chunk-size")), budget // 4)
+    with dask.config.set({"array.chunk-size": limit}):
+        return obj.chunk("auto")
+
+
+_ADVICE = {
+    "read_mostly": ("cudaMemAdviseSetReadMostly", "cudaMemAdviseUnsetReadMostly"),
+    "preferred_location": (
+        "cudaMemAdviseSetPreferredLocation",
+        "cudaMemAdviseUnsetPreferredLocation",
+    ),
+    "accessed_by": ("cudaMemAdviseSetAccessedBy", "cudaMemAdviseUnsetAccessedBy"),
+}
+
+
+def _managed_range(array):
+    """Return the pointer and size of cupy ``array``, which must be in managed memory."""
+    attributes = cp.cuda.runtime.pointerGetAttributes(array.data.ptr)
+    if attributes.type != cp.cuda.runtime.memoryTypeManaged:
+        raise TypeError(
+            "Expected data in CUDA managed memory, use `.cupy.as_cupy(memory='managed')`."
+        )
+    if array.size == 0:
+        return array.data.ptr, 0
+    # a strided view spans the memory between its first and last elements
+    extents = [stride * (n - 1) for stride, n in zip(array.strides, array.shape, strict=True)]
+    low = array.data.ptr + sum(e for e in extents if e < 0)
+    high = array.data.ptr + sum(e for e in extents if e > 0) + array.itemsize
+    return low, high - low
+
+
+def _device_id(device):
+    if device == "host":
+        return cp.cuda.runtime.cudaCpuDeviceId
+    return cp.cuda.Device(device).id
+
+
+def prefetch_managed(array, device=None, stream=None):
+    """
+    Migrate managed ``array`` to ``device`` ahead of its use.
+
+    ``device`` is a device id, None for the current device or ``"host"``. The
+    migration is ordered on ``stream``, by default cupy's current stream.
+    """
+    ptr, nbytes = _managed_range(array)
+    if stream is None:
+        stream = cp.cuda.get_current_stream()
+    if nbytes:
+        cp.cuda.runtime.memPrefetchAsync(ptr, nbytes, _device_id(device), stream.ptr)
+
+
+def advise_managed(array, advice, device=None, unset=False):
+    """
+    Give the driver a usage hint for managed ``array``.
+
+    ``advice`` is one of ``"read_mostly"``, ``"preferred_location"`` or
+    ``"accessed_by"``, applying to ``device`` as in :func:`prefetch_managed`.
+    ``unset=True`` withdraws the hint.
+    """
+    if advice not in _ADVICE:
+        raise ValueError(f"advice must be one of {tuple(_ADVICE)!r}, got {advice!r}.")
+    ptr, nbytes = _managed_range(array)
+    name = _ADVICE[advice][unset]
+    if nbytes:
+        cp.cuda.runtime.memAdvise(ptr, nbytes, getattr(cp.cuda.runtime, name), _device_id(device))
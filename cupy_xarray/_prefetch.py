@@ -0,0 +1,191 @@
+import collections
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from . import telemetry
+from ._compat import cp, is_cupy_array
+from ._transfer import _pinned_pool, _stage, from_device_array, is_device_array, plan_cast
+
+# marks the end of the arrays put on the queue by the prefetch thread
+_DONE = object()
+
+
+def _copy_on_stream(array, stream, consumer, label=None, astype=None, cast=None, out=None):
+    """
+    Copy host ``array`` to the device on ``stream`` and wait for the copy.
+
+    The copy is written into ``out`` if it has the right shape and dtype.
+    New device buffers are allocated on the ``consumer`` stream, which the
+    arrays are handed to, and the copy waits for the work queued on it so
+    far: a buffer may be memory the consumer freed while its kernels were
+    still reading it.
+    """
+    if is_device_array(array):
+        source = from_device_array(array)
+        if astype is None or np.dtype(astype) == source.dtype:
+            return source
+        wire, after = np.dtype(astype), None
+    else:
+        source = np.asarray(array)
+        wire, after = plan_cast(source.dtype, astype, cast, sender="host")
+    dtype = wire if after is None else after
+    with consumer:
+        if out is None or out.shape != source.shape or out.dtype != dtype:
+            out = cp.empty(source.shape, dtype=dtype)
+        buffer = out if after is None else cp.empty(source.shape, dtype=wire)
+    stream.wait_event(consumer.record())
+    with stream:
+        if is_cupy_array(source):
+            out[...] = source
+            stream.synchronize()
+            return out
+        if source.size:
+            staging = _pinned_pool.acquire(source.size * wire.itemsize)
+            try:
+                host = _stage(staging, source, wire)
+                with telemetry.transfer(telemetry.HOST_TO_DEVICE, host, label):
+                    buffer.set(host, stream=stream)
+                if after is not None:
+                    out[...] = buffer
+                # the staging buffer may only be reused once the copy is done
+                stream.synchronize()
+            finally:
+                _pinned_pool.release(staging)
+        return out
+
+
+def _per_array(value, n):
+    return value if isinstance(value, tuple) else (value,) * n
+
+
+class _Prefetcher:
+    """State shared by the prefetch thread and the generator handing out its arrays."""
+
+    def __init__(self, loads, depth, reuse, label, astype, cast):
+        self.loads = loads
+        self.depth = depth
+        self.reuse = reuse
+        self.label = label
+        self.astype = astype
+        self.cast = cast
+        self.device = cp.cuda.Device().id
+        self.slots = threading.Semaphore(depth)
+        self.results = queue.SimpleQueue()
+        self.stop = threading.Event()
+        # ring of device buffers reused with ``reuse=True``
+        self.buffers = [None] * depth
+        # stream the caller queues its work on, set when iteration starts
+        self.consumer = None
+
+    def run(self):
+        """Body of the prefetch thread."""
+        readers = ThreadPoolExecutor(self.depth, thread_name_prefix="cupy-xarray-read")
+        pending = collections.deque()
+        try:
+            with cp.cuda.Device(self.device):
+                stream = cp.cuda.Stream(non_blocking=True)
+                for count, (key, load) in enumerate(self.loads):
+                    if not self._acquire(pending, stream):
+                        return
+                    pending.append((count, key, readers.submit(load)))
+                while pending:
+                    self._copy(*pending.popleft(), stream)
+        except Exception as e:
+            self.results.put(e)
+        else:
+            self.results.put(_DONE)
+        finally:
+            readers.shutdown(cancel_futures=True)
+
+    def _acquire(self, pending, stream):
+        """
+        Wait for a free slot, returning False if stopped meanwhile.
+
+        Loads that are already running are copied while waiting, as the
+        caller can only free a slot once it received their arrays.
+        """
+        while not self.slots.acquire(blocking=False):
+            if pending:
+                self._copy(*pending.popleft(), stream)
+                continue
+            while not self.slots.acquire(timeout=0.1):
+                if self.stop.is_set():
+                    return False
+            break
+        return not self.stop.is_set()
+
+    def _copy(self, count, key, future, stream):
+        arrays = future.result()
+        single = not isinstance(arrays, tuple)
+        if single:
+            arrays = (arrays,)
+        n = len(arrays)
+        slot = count % self.depth
+        outs = self.buffers[slot] if self.reuse and self.buffers[slot] else (None,) * n
+        copied = tuple(
+            _copy_on_stream(array, stream, self.consumer, label, astype, self.cast, out)
+            for array, label, astype, out in zip(
+                arrays,
+                _per_array(self.label, n),
+                _per_array(self.astype, n),
+                outs,
+                strict=True,
+            )
+        )
+        if self.reuse:
+            self.buffers[slot] = copied
+        self.results.put((key, copied[0] if single else copied))
+
+    def __iter__(self):
+        self.consumer = cp.cuda.get_current_stream()
+        thread = threading.Thread(target=self.run, name="cupy-xarray-prefetch", daemon=True)
+        thread.start()
+        try:
+            while (item := self.results.get()) is not _DONE:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+                self.slots.release()
+        finally:
+            self.stop.set()
+            thread.join()
+
+
+def region_loads(variable, regions):
+    """Yield ``(region, load)`` pairs computing each region of ``variable``."""
+    for region in regions:
+        yield region, lambda region=region: variable.isel(region).compute().data
+
+
+def prefetch_to_device(loads, depth=2, reuse=False, label=None, astype=None, cast=None):
+    """
+    Yield device copies of a sequence of host arrays, copying ahead of use.
+
+    ``loads`` is an iterable of ``(key, load)`` pairs, where calling ``load``
+    returns a host array or a tuple of them, e.g. by computing one dask
+    chunk. Loads run ahead in a pool of reader threads, and a background
+    thread copies their results to the current device through pinned memory
+    on its own non-blocking stream, while the caller works on the arrays it
+    was already handed. ``(key, device_arrays)`` pairs are yielded in the
+    order of ``loads``, each once its copies have completed.
+
+    At most ``depth`` loads are held at a time, counting the one the caller
+    is working on: the next load only starts once the caller asks for the
+    one after it. ``depth=2`` is double buffering, and ``depth=1`` disables
+    the overlap. With ``reuse=True`` the copies are written into a ring of
+    ``depth`` sets of device buffers instead of new allocations, so that
+    the arrays handed out are overwritten once the caller has moved on to
+    the next load. Errors raised by a load are re-raised by the generator.
+    Closing the generator early stops the threads after the loads in
+    progress.
+
+    ``label``, ``astype`` and ``cast`` are as for
+    :func:`cupy_xarray._transfer.to_device`. For loads returning tuples,
+    ``label`` and ``astype`` may be tuples holding a value for each array.
+    """
+    if depth < 1:
+        raise ValueError(f"depth must be at least 1, got {depth!r}.")
+    yield from _Prefetcher(loads, depth, reuse, label, astype, cast)
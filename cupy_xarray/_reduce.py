@@ -0,0 +1,213 @@
+import numpy as np
+
+from ._compat import cp
+from ._memory import memory_budget
+from ._prefetch import prefetch_to_device, region_loads
+
+
+def _float_dtype(dtype):
+    """Dtype of means and variances of data of ``dtype``."""
+    return dtype if dtype.kind in "fc" else np.dtype("float64")
+
+
+class Reduction:
+    """
+    Reduction whose partial results over slabs of an array can be merged.
+
+    :meth:`partial` reduces one slab to a state, :meth:`merge` combines the
+    states of two slabs, and :meth:`finalize` turns a state into the result.
+    """
+
+    def __init__(self, skipna=True):
+        self.skipna = skipna
+
+    def partial(self, slab, axis):
+        raise NotImplementedError
+
+    def merge(self, a, b):
+        return a + b
+
+    def finalize(self, state):
+        return state
+
+    def _count(self, slab, axis, keepdims=False):
+        if self.skipna:
+            return (~cp.isnan(slab)).sum(axis=axis, keepdims=keepdims)
+        count = np.prod([slab.shape[i] for i in axis], dtype=np.int64)
+        shape = [1 if i in axis else n for i, n in enumerate(slab.shape)]
+        count = cp.full(shape, count, dtype=np.int64)
+        return count if keepdims else count.squeeze(axis)
+
+    def _sum(self, slab, axis, keepdims=False):
+        total = cp.nansum if self.skipna else cp.sum
+        return total(slab, axis=axis, keepdims=keepdims)
+
+
+class Sum(Reduction):
+    def partial(self, slab, axis):
+        return self._sum(slab, axis)
+
+
+class Count(Reduction):
+    def partial(self, slab, axis):
+        return self._count(slab, axis)
+
+
+class Min(Reduction):
+    def partial(self, slab, axis):
+        return (cp.nanmin if self.skipna else cp.min)(slab, axis=axis)
+
+    def merge(self, a, b):
+        return (cp.fmin if self.skipna else cp.minimum)(a, b)
+
+
+class Max(Reduction):
+    def partial(self, slab, axis):
+        return (cp.nanmax if self.skipna else cp.max)(slab, axis=axis)
+
+    def merge(self, a, b):
+        return (cp.fmax if self.skipna else cp.maximum)(a, b)
+
+
+class Mean(Reduction):
+    """Mean from the merged sums and counts of the slabs."""
+
+    def partial(self, slab, axis):
+        return self._sum(slab, axis), self._count(slab, axis)
+
+    def merge(self, a, b):
+        return a[0] + b[0], a[1] + b[1]
+
+    def finalize(self, state):
+        total, count = state
+        mean = cp.where(count > 0, total / cp.maximum(count, 1), np.nan)
+        return mean.astype(_float_dtype(total.dtype), copy=False)
+
+
+class Var(Reduction):
+    """
+    Variance from the counts, means and sums of squared deviations of the slabs.
+
+    The slab statistics are merged pairwise as described by Chan, Golub and
+    LeVeque, which avoids the cancellation of a sum-of-squares formula.
+    """
+
+    def __init__(self, skipna=True, ddof=0):
+        super().__init__(skipna)
+        self.ddof = ddof
+
+    def partial(self, slab, axis):
+        count = self._count(slab, axis, keepdims=True)
+        mean = self._sum(slab, axis, keepdims=True) / cp.maximum(count, 1)
+        deviation = slab - mean
+        if self.skipna:
+            deviation = cp.where(cp.isnan(slab), 0, deviation)
+        m2 = (deviation * deviation).sum(axis=axis)
+        return count.squeeze(axis), mean.squeeze(axis), m2
+
+    def merge(self, a, b):
+        count_a, mean_a, m2_a = a
+        count_b, mean_b, m2_b = b
+        count = count_a + count_b
+        delta = mean_b - mean_a
+        weight = count_b / cp.maximum(count, 1)
+        mean = mean_a + delta * weight
+        m2 = m2_a + m2_b + delta * delta * count_a * weight
+        return count, mean, m2
+
+    def finalize(self, state):
+        count, _, m2 = state
+        var = cp.where(count > self.ddof, m2 / cp.maximum(count - self.ddof, 1), np.nan)
+        return var.astype(_float_dtype(m2.dtype), copy=False)
+
+
+class Std(Var):
+    def finalize(self, state):
+        return cp.sqrt(super().finalize(state))
+
+
+class MinMax(Reduction):
+    """Minimum and maximum in one pass, used to find the range of a histogram."""
+
+    def partial(self, slab, axis):
+        return Min(self.skipna).partial(slab, axis), Max(self.skipna).partial(slab, axis)
+
+    def merge(self, a, b):
+        return Min(self.skipna).merge(a[0], b[0]), Max(self.skipna).merge(a[1], b[1])
+
+
+class Histogram(Reduction):
+    """Counts of the values falling into the bins delimited by ``edges``."""
+
+    def __init__(self, edges, skipna=True):
+        super().__init__(skipna)
+        self.edges = edges
+
+    def partial(self, slab, axis):
+        values = slab.ravel()
+        if self.skipna:
+            values = values[~cp.isnan(values)]
+        counts, _ = cp.histogram(values, bins=self.edges)
+        return counts
+
+
+REDUCTIONS = {
+    "count": Count,
+    "histogram": Histogram,
+    "max": Max,
+    "mean": Mean,
+    "min": Min,
+    "std": Std,
+    "sum": Sum,
+    "var": Var,
+}
+
+
+def default_slab_size(variable, slab_dim, prefetch, dtype=None):
+    """
+    Number of elements along ``slab_dim`` in each slab of ``variable``.
+
+    Sized so that the ``prefetch`` slabs held at a time take at most half of
+    the device memory budget, leaving the rest for intermediates.
+    """
+    dtype = variable.dtype if dtype is None else np.dtype(dtype)
+    row_nbytes = variable.size // max(variable.sizes[slab_dim], 1) * dtype.itemsize
+    return max(1, memory_budget() // (2 * prefetch) // max(row_nbytes, 1))
+
+
+def stream_reduce(variable, reduction, dims, slab_dim, size, prefetch=2, label=None, astype=None):
+    """
+    Reduce ``variable`` over ``dims`` on the device, streaming it through in slabs.
+
+    Slabs of ``size`` elements along ``slab_dim`` are copied to the device
+    ahead of use, see :func:`cupy_xarray._prefetch.prefetch_to_device`. If
+    ``slab_dim`` is reduced, the partial results of the slabs are merged;
+    otherwise each slab gives its own part of the result. A ``slab_dim`` of
+    None streams the whole variable as one slab. Returns the result as a
+    cupy array with the remaining dimensions in their original order.
+    """
+    axis = tuple(variable.get_axis_num(dim) for dim in dims)
+    if slab_dim is None:
+        regions = [{}]
+    else:
+        length = variable.sizes[slab_dim]
+        regions = (
+            {slab_dim: slice(start, min(start + size, length))}
+            for start in range(0, max(length, 1), size)
+        )
+    state = None
+    parts = []
+    for _, slab in prefetch_to_device(
+        region_loads(variable, regions), depth=prefetch, reuse=True, label=label, astype=astype
+    ):
+        partial = reduction.partial(slab, axis)
+        if slab_dim is not None and slab_dim not in dims:
+            parts.append(reduction.finalize(partial))
+        elif state is None:
+            state = partial
+        else:
+            state = reduction.merge(state, partial)
+    if state is not None:
+        return reduction.finalize(state)
+    remaining = [dim for dim in variable.dims if dim not in dims]
+    return cp.concatenate(parts, axis=remaining.index(slab_dim))
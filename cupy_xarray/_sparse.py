@@ -0,0 +1,150 @@
+import numpy as np
+from xarray.backends import BackendArray
+from xarray.core import indexing
+
+from ._compat import cp
+from ._transfer import to_device, to_host
+
+
+def _cast_fill_value(fill_value, dtype):
+    return np.asarray(fill_value).astype(dtype)[()]
+
+
+class DeviceCOOArray(BackendArray):
+    """
+    Sparse array in coordinate format whose non-zeros live on the device.
+
+    xarray cannot hold cupyx sparse matrices, which are two-dimensional and
+    do not implement the array protocols it relies on. The coordinates and
+    values are therefore kept in plain cupy arrays, and indexing or loading
+    builds a dense cupy array of just the requested region.
+
+    Parameters
+    ----------
+    coords : cupy.ndarray
+        Integer array of shape ``(ndim, nnz)`` with the index of each
+        stored value. Each index is stored at most once.
+    data : cupy.ndarray
+        The ``nnz`` stored values.
+    shape : tuple of int
+        Shape of the dense array.
+    fill_value : scalar
+        Value of the elements that are not stored.
+    """
+
+    __slots__ = ("coords", "data", "dtype", "fill_value", "shape")
+
+    def __init__(self, coords, data, shape, fill_value):
+        self.coords = coords
+        self.data = data
+        self.shape = tuple(shape)
+        self.dtype = data.dtype
+        self.fill_value = fill_value
+
+    @property
+    def nnz(self):
+        return self.data.size
+
+    @property
+    def device_nbytes(self):
+        """Bytes of device memory held by the coordinates and values."""
+        return self.coords.nbytes + self.data.nbytes
+
+    def __getitem__(self, key):
+        return indexing.explicit_indexing_adapter(
+            key, self.shape, indexing.IndexingSupport.BASIC, self._getitem
+        )
+
+    def _getitem(self, key):
+        return self.subset(key).todense()
+
+    def subset(self, key):
+        """Select a tuple of integers and slices, keeping the result sparse."""
+        keep = cp.ones(self.nnz, dtype=bool)
+        coords = []
+        shape = []
+        for c, k, size in zip(self.coords, key, self.shape, strict=True):
+            if isinstance(k, slice):
+                start, stop, step = k.indices(size)
+                if step > 0:
+                    keep &= (c >= start) & (c < stop)
+                else:
+                    keep &= (c <= start) & (c > stop)
+                keep &= (c - start) % step == 0
+                coords.append((c - start) // step)
+                shape.append(len(range(start, stop, step)))
+            else:
+                keep &= c == k % size
+        coords = cp.stack(coords) if coords else cp.empty((0, self.nnz), dtype=self.coords.dtype)
+        return type(self)(coords[:, keep], self.data[keep], shape, self.fill_value)
+
+    def astype(self, dtype):
+        fill_value = _cast_fill_value(self.fill_value, dtype)
+        return type(self)(self.coords, self.data.astype(dtype), self.shape, fill_value)
+
+    def todense(self):
+        """Return the data as a dense cupy array."""
+        out = cp.full(self.shape, self.fill_value, dtype=self.dtype)
+        if not self.shape:
+            # a single element, stored or not
+            return self.data.reshape(()) if self.nnz else out
+        out[tuple(self.coords)] = self.data
+        return out
+
+    def to_cupyx(self, format="coo"):
+        """Return two-dimensional data as a cupyx.scipy.sparse matrix in ``format``."""
+        if len(self.shape) != 2:
+            raise ValueError(
+                f"cupyx sparse matrices are two-dimensional, got {len(self.shape)} dimensions."
+            )
+        if self.fill_value != 0:
+            raise ValueError(
+                f"cupyx sparse matrices have a fill value of 0, got {self.fill_value!r}."
+            )
+        import cupyx.scipy.sparse
+
+        row, col = self.coords
+        matrix = cupyx.scipy.sparse.coo_matrix((self.data, (row, col)), shape=self.shape)
+        return matrix.asformat(format)
+
+
+def sparse_to_device(array, pinned=False, label=None, astype=None, cast=None):
+    """
+    Copy the non-zeros of pydata/sparse ``array`` to the current device.
+
+    Only the coordinates and values are transferred, so the cost scales with
+    the number of stored elements instead of the dense size.
+    """
+    import sparse
+
+    coo = sparse.as_coo(array)
+    coords = to_device(coo.coords, pinned=pinned, label=label)
+    data = to_device(coo.data, pinned=pinned, label=label, astype=astype, cast=cast)
+    fill_value = coo.fill_value if astype is None else _cast_fill_value(coo.fill_value, astype)
+    return DeviceCOOArray(coords, data, coo.shape, fill_value)
+
+
+def sparse_to_host(array, label=None, astype=None):
+    """Copy :class:`DeviceCOOArray` ``array`` back to a pydata/sparse COO array."""
+    import sparse
+
+    coords = to_host(array.coords, label=label)
+    data = to_host(array.data, label=label, astype=astype)
+    fill_value = array.fill_value if astype is None else _cast_fill_value(array.fill_value, astype)
+    return sparse.COO(coords, data, shape=array.shape, fill_value=fill_value, has_duplicates=False)
+
+
+def device_coo(data):
+    """
+    Return the sparse device data behind a Variable's ``data``, or None.
+
+    Only basic indexing, as done by ``isel`` and friends, is followed, so
+    that other lazily indexed sparse data is handled as dense data instead.
+    """
+    if (
+        isinstance(data, indexing.LazilyIndexedArray)
+        and isinstance(data.array, DeviceCOOArray)
+        and isinstance(data.key, indexing.BasicIndexer)
+    ):
+        return data.array.subset(data.key.tuple)
+    return None
@@ -0,0 +1,210 @@
+import threading
+import weakref
+from collections import OrderedDict
+
+from xarray.backends import BackendArray
+from xarray.core import indexing
+
+from ._compat import cp, cupyx
+from ._transfer import to_device, to_host
+
+
+class SpillableArray(BackendArray):
+    """
+    Device array that the :class:`SpillManager` may move to host memory.
+
+    The data lives either on the device or, once spilled, in pinned host
+    memory. Indexing or loading brings spilled data back to the device it was
+    on. Arrays obtained from an earlier access keep their device memory alive
+    and no longer share memory with the managed data after a spill.
+
+    Parameters
+    ----------
+    array : cupy.ndarray
+        Device data to manage.
+    label : hashable, optional
+        Variable name reported to :mod:`cupy_xarray.telemetry` hooks.
+    manager : SpillManager, optional
+        Manager tracking the array. Defaults to the shared manager.
+    """
+
+    __slots__ = (
+        "__weakref__",
+        "device",
+        "device_id",
+        "dtype",
+        "host",
+        "label",
+        "manager",
+        "shape",
+    )
+
+    def __init__(self, array, label=None, manager=None):
+        self.device = cp.ascontiguousarray(array)
+        self.device_id = array.device.id
+        self.host = None
+        self.shape = array.shape
+        self.dtype = array.dtype
+        self.label = label
+        self.manager = _spill_manager if manager is None else manager
+        self.manager.register(self)
+
+    @property
+    def nbytes(self):
+        return self.size * self.dtype.itemsize
+
+    @property
+    def device_nbytes(self):
+        """Bytes of device memory held, none once spilled."""
+        return 0 if self.spilled else self.nbytes
+
+    @property
+    def spilled(self):
+        """Whether the data currently lives in host memory."""
+        return self.device is None
+
+    def __getitem__(self, key):
+        return indexing.explicit_indexing_adapter(
+            key, self.shape, indexing.IndexingSupport.BASIC, self._getitem
+        )
+
+    def _getitem(self, key):
+        return self.manager.acquire(self)[key]
+
+    def spill(self):
+        """Move the data to pinned host memory, returning the device bytes released."""
+        if self.device is None:
+            return 0
+        host = cupyx.empty_pinned(self.shape, dtype=self.dtype)
+        with cp.cuda.Device(self.device_id):
+            self.host = to_host(self.device, out=host, label=self.label)
+        self.device = None
+        return self.host.nbytes
+
+    def unspill(self):
+        """Move spilled data back to the device it was spilled from."""
+        if self.device is not None:
+            return
+        with cp.cuda.Device(self.device_id):
+            self.device = to_device(self.host, label=self.label)
+        self.host = None
+
+
+class SpillManager:
+    """
+    Least-recently-used residency manager for :class:`SpillableArray`.
+
+    Once the first array is registered, cupy's allocator is wrapped so that
+    an allocation failing with ``OutOfMemoryError`` spills the least
+    recently used arrays to host memory and is then retried. Spilled arrays
+    are moved back on their next access.
+
+    The wrapper is installed process-wide with ``cupy.cuda.set_allocator``
+    and calls the allocator that was set before. If another allocator is set
+    later, registering the next array wraps that one instead.
+    :meth:`uninstall` restores the allocator that was wrapped.
+    """
+
+    def __init__(self):
+        # id -> weak reference, least recently used first
+        self._arrays = OrderedDict()
+        self._lock = threading.RLock()
+        self._allocator = None
+
+    def register(self, array):
+        """Start tracking ``array``."""
+        key = id(array)
+        ref = weakref.ref(array, lambda _: self._forget(key))
+        with self._lock:
+            self._arrays[key] = ref
+        self._install()
+
+    def _forget(self, key):
+        with self._lock:
+            self._arrays.pop(key, None)
+
+    def acquire(self, array):
+        """Return the device data of ``array``, moving it back if spilled."""
+        with self._lock:
+            self._arrays.move_to_end(id(array))
+            array.unspill()
+            return array.device
+
+    def spill(self, nbytes=None):
+        """
+        Spill least recently used arrays until ``nbytes`` device bytes are released.
+
+        Spills every resident array if ``nbytes`` is None. Returns the number
+        of bytes released.
+        """
+        released = 0
+        with self._lock:
+            for ref in list(self._arrays.values()):
+                if nbytes is not None and released >= nbytes:
+                    break
+                array = ref()
+                if array is not None:
+                    released += array.spill()
+        return released
+
+    @property
+    def device_bytes(self):
+        """Bytes of managed data resident on the device."""
+        return sum(array.nbytes for array in self._live() if not array.spilled)
+
+    @property
+    def spilled_bytes(self):
+        """Bytes of managed data spilled to host memory."""
+        return sum(array.nbytes for array in self._live() if array.spilled)
+
+    def _live(self):
+        with self._lock:
+            arrays = [ref() for ref in self._arrays.values()]
+        return [array for array in arrays if array is not None]
+
+    def _install(self):
+        with self._lock:
+            current = cp.cuda.get_allocator()
+            if current != self._malloc:
+                self._allocator = current
+                cp.cuda.set_allocator(self._malloc)
+
+    def uninstall(self):
+        """Restore the allocator wrapped by the manager, if its wrapper is still set."""
+        with self._lock:
+            if self._allocator is None:
+                return
+            if cp.cuda.get_allocator() == self._malloc:
+                cp.cuda.set_allocator(self._allocator)
+            self._allocator = None
+
+    def _malloc(self, size):
+        while True:
+            try:
+                return self._allocator(size)
+            except cp.cuda.memory.OutOfMemoryError:
+                if not self.spill(size):
+                    raise
+
+
+_spill_manager = SpillManager()
+
+
+def spill_manager():
+    """Return the manager of arrays created by ``as_cupy(managed=True)``."""
+    return _spill_manager
+
+
+def restore_allocator():
+    """
+    Restore the cupy allocator that was set before ``as_cupy(managed=True)``.
+
+    Managed arrays are no longer spilled under memory pressure afterwards,
+    until the next one is created.
+    """
+    _spill_manager.uninstall()
+
+
+def managed_array(array, label=None):
+    """Wrap device ``array`` so that it can be spilled under memory pressure."""
+    return indexing.LazilyIndexedArray(SpillableArray(array, label=label))
@@ -0,0 +1,561 @@
+import contextlib
+import math
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+from . import telemetry
+from ._compat import cp, cupyx, is_cupy_array
+from .options import OPTIONS
+
+
+def _bucket_size(nbytes):
+    """Round ``nbytes`` up to the next power of two (minimum one page)."""
+    return max(4096, 1 << (int(nbytes) - 1).bit_length())
+
+
+class PinnedMemoryPool:
+    """
+    Size-bucketed cache of page-locked host buffers.
+
+    Requests are rounded up to the next power of two so that buffers can be
+    reused across arrays of similar size. Released buffers are kept for reuse
+    and freed least-recently-used first once the idle total exceeds
+    ``max_bytes``.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Upper bound on the bytes held by idle buffers. Defaults to the
+        ``pinned_pool_size`` option.
+    """
+
+    def __init__(self, max_bytes=None):
+        self._max_bytes = max_bytes
+        self._free = OrderedDict()
+        self._in_use = {}
+        self._lock = threading.Lock()
+
+    @property
+    def max_bytes(self):
+        if self._max_bytes is None:
+            return OPTIONS["pinned_pool_size"]
+        return self._max_bytes
+
+    @property
+    def cached_bytes(self):
+        """Number of bytes held by idle buffers."""
+        return sum(mem.size for mem in self._free.values())
+
+    def acquire(self, nbytes):
+        """
+        Check out a pinned buffer of at least ``nbytes`` bytes.
+
+        Returns
+        -------
+        buffer: numpy.ndarray
+            One-dimensional ``uint8`` array of length ``nbytes`` backed by
+            pinned memory. Must be handed back with :meth:`release`.
+        """
+        size = _bucket_size(nbytes)
+        with self._lock:
+            for key in reversed(self._free):
+                if self._free[key].size == size:
+                    mem = self._free.pop(key)
+                    break
+            else:
+                mem = cp.cuda.PinnedMemory(size)
+            ptr = cp.cuda.PinnedMemoryPointer(mem, 0)
+            buffer = np.ndarray((nbytes,), dtype=np.uint8, buffer=ptr)
+            self._in_use[id(buffer)] = mem
+        return buffer
+
+    def release(self, buffer):
+        """Return a buffer obtained from :meth:`acquire` to the pool."""
+        with self._lock:
+            mem = self._in_use.pop(id(buffer))
+            self._free[id(mem)] = mem
+            self._evict()
+
+    def clear(self):
+        """Free all idle buffers."""
+        with self._lock:
+            self._free.clear()
+
+    def _evict(self):
+        total = self.cached_bytes
+        while self._free and total > self.max_bytes:
+            _, mem = self._free.popitem(last=False)
+            total -= mem.size
+
+
+_pinned_pool = PinnedMemoryPool()
+
+
+def pinned_pool():
+    """Return the pinned staging pool shared by the accessors."""
+    return _pinned_pool
+
+
+def _stage(staging, array, dtype=None):
+    """
+    Copy ``array`` into the pinned ``staging`` buffer and return it as a view.
+
+    With ``dtype`` the values are converted while they are copied.
+    """
+    dtype = array.dtype if dtype is None else dtype
+    host = staging.view(dtype).reshape(array.shape)
+    np.copyto(host, array, casting="no" if dtype == array.dtype else "unsafe")
+    return host
+
+
+def plan_cast(source, astype, cast=None, sender="host"):
+    """
+    Split a conversion from dtype ``source`` to ``astype`` around a copy.
+
+    Narrowing conversions happen on the sending side, before the copy, so
+    that fewer bytes are moved, and widening ones after the copy. ``cast``
+    forces the conversion onto the ``"host"`` or the ``"device"``.
+
+    Returns
+    -------
+    wire: numpy.dtype
+        Dtype of the data while it is copied.
+    after: numpy.dtype or None
+        Dtype to convert to once copied, if any.
+    """
+    source = np.dtype(source)
+    if astype is None or np.dtype(astype) == source:
+        return source, None
+    astype = np.dtype(astype)
+    before = astype.itemsize < source.itemsize if cast is None else cast == sender
+    return (astype, None) if before else (source, astype)
+
+
+class HostBufferCache:
+    """
+    Reusable pinned output buffers keyed by shape and dtype.
+
+    Repeated device-to-host copies of same-shaped arrays land in the same
+    buffer instead of allocating (and page-faulting) a new one every time.
+    Buffers are dropped least-recently-used first once their total exceeds
+    ``max_bytes``.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Upper bound on the bytes held by cached buffers. Defaults to the
+        ``host_buffer_cache_size`` option.
+    """
+
+    def __init__(self, max_bytes=None):
+        self._max_bytes = max_bytes
+        self._buffers = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_bytes(self):
+        if self._max_bytes is None:
+            return OPTIONS["host_buffer_cache_size"]
+        return self._max_bytes
+
+    @property
+    def cached_bytes(self):
+        """Number of bytes held by cached buffers."""
+        return sum(buffer.nbytes for buffer in self._buffers.values())
+
+    def get(self, shape, dtype):
+        """Return the pinned buffer for ``shape`` and ``dtype``, allocating it if needed."""
+        key = (tuple(shape), np.dtype(dtype))
+        with self._lock:
+            buffer = self._buffers.pop(key, None)
+            if buffer is None:
+                buffer = cupyx.empty_pinned(shape, dtype=dtype)
+            self._buffers[key] = buffer
+            total = self.cached_bytes
+            while len(self._buffers) > 1 and total > self.max_bytes:
+                _, evicted = self._buffers.popitem(last=False)
+                total -= evicted.nbytes
+        return buffer
+
+    def clear(self):
+        """Drop all cached buffers."""
+        with self._lock:
+            self._buffers.clear()
+
+
+_host_buffer_cache = HostBufferCache()
+
+
+def host_buffer_cache():
+    """Return the output buffer cache shared by the accessors."""
+    return _host_buffer_cache
+
+
+def to_host(array, out=None, reuse=False, label=None, astype=None):
+    """
+    Copy cupy ``array`` to the host.
+
+    Parameters
+    ----------
+    array : cupy.ndarray
+        Array to copy.
+    out : numpy.ndarray, optional
+        C-contiguous array of matching shape and dtype to copy into. Pinned
+        memory gives the best bandwidth.
+    reuse : bool, default: False
+        Copy into the buffer for this shape and dtype from the shared
+        :class:`HostBufferCache`. The same buffer is returned, and
+        overwritten, by later calls for the same shape and dtype.
+    label : hashable, optional
+        Variable name reported to :mod:`cupy_xarray.telemetry` hooks.
+    astype : dtype, optional
+        Dtype to convert to. Narrowing conversions are made on the device
+        before the copy, widening ones on the host after it.
+    """
+    wire, after = plan_cast(array.dtype, astype, sender="device")
+    if wire != array.dtype:
+        array = array.astype(wire)
+    if out is None and reuse:
+        out = _host_buffer_cache.get(array.shape, array.dtype)
+    with telemetry.transfer(telemetry.DEVICE_TO_HOST, array, label):
+        host = array.get(out=out)
+    return host if after is None else host.astype(after)
+
+
+# single thread waiting for the asynchronous device-to-host copies, in order
+_copier = None
+_copier_lock = threading.Lock()
+# side stream of the copier thread for each device, only used by that thread
+_copy_streams = {}
+
+
+def _copy_executor():
+    global _copier
+    with _copier_lock:
+        if _copier is None:
+            _copier = ThreadPoolExecutor(1, thread_name_prefix="cupy-xarray-copy")
+    return _copier
+
+
+def _copy_to_host(array, ready, device, host, label):
+    """Copy ``array`` into ``host`` once ``ready`` has completed, on a side stream."""
+    with cp.cuda.Device(device):
+        stream = _copy_streams.get(device)
+        if stream is None:
+            stream = _copy_streams[device] = cp.cuda.Stream(non_blocking=True)
+        with stream:
+            stream.wait_event(ready)
+            with telemetry.transfer(telemetry.DEVICE_TO_HOST, array, label):
+                array.get(out=host, stream=stream)
+                stream.synchronize()
+    return host
+
+
+def map_future(future, func):
+    """Return a future resolving to ``func`` applied to the result of ``future``."""
+    mapped = Future()
+
+    def _done(future):
+        try:
+            mapped.set_result(func(future.result()))
+        except Exception as e:
+            mapped.set_exception(e)
+
+    future.add_done_callback(_done)
+    return mapped
+
+
+def to_host_async(array, out=None, reuse=False, label=None, astype=None):
+    """
+    Start copying cupy ``array`` to the host, returning a future of the copy.
+
+    The copy waits for the work queued on the current stream so far, marked
+    by an event, and then runs on a separate non-blocking stream into pinned
+    memory, so that the caller can queue further kernels meanwhile. A single
+    background thread waits for the copies, in the order they were started.
+    ``array`` must not be modified until the future is done.
+
+    Parameters are as for :func:`to_host`.
+
+    Returns
+    -------
+    future: concurrent.futures.Future
+        Future resolving to the numpy array.
+    """
+    wire, after = plan_cast(array.dtype, astype, sender="device")
+    if wire != array.dtype:
+        array = array.astype(wire)
+    if out is None:
+        array = cp.ascontiguousarray(array)
+        if reuse:
+            out = _host_buffer_cache.get(array.shape, array.dtype)
+        else:
+            out = cupyx.empty_pinned(array.shape, dtype=array.dtype)
+    ready = cp.cuda.get_current_stream().record()
+    future = _copy_executor().submit(_copy_to_host, array, ready, cp.cuda.Device().id, out, label)
+    return future if after is None else map_future(future, lambda host: host.astype(after))
+
+
+# DLPack device types of memory that cupy can address directly
+_DLPACK_CUDA_DEVICES = (2, 13)  # kDLCUDA, kDLCUDAManaged
+
+
+def is_device_array(array):
+    """
+    Whether ``array`` is a (possibly foreign) array in CUDA device memory.
+
+    Producers are recognized through ``__cuda_array_interface__`` (Numba,
+    PyTorch, ...) or through ``__dlpack_device__`` reporting CUDA memory
+    (JAX, PyTorch, ...).
+    """
+    if is_cupy_array(array) or hasattr(array, "__cuda_array_interface__"):
+        return True
+    if hasattr(array, "__dlpack_device__"):
+        device_type, _ = array.__dlpack_device__()
+        return device_type in _DLPACK_CUDA_DEVICES
+    return False
+
+
+def from_device_array(array):
+    """
+    Wrap a foreign device array as a cupy array without copying.
+
+    DLPack producers are handed cupy's current stream so that they can order
+    their pending work before it; ``__cuda_array_interface__`` producers are
+    synchronized according to the stream they advertise.
+    """
+    if is_cupy_array(array):
+        return array
+    if hasattr(array, "__dlpack__") and hasattr(array, "__dlpack_device__"):
+        return cp.from_dlpack(array)
+    return cp.asarray(array)
+
+
+def device_allocation(memory=None):
+    """
+    Context in which cupy allocates device arrays from ``memory``.
+
+    ``"managed"`` allocates CUDA managed memory, which the driver pages
+    between host and device on demand, so that arrays may be larger than
+    device memory. ``"device"`` or None keep the current allocator.
+    """
+    if memory == "managed":
+        return cp.cuda.using_allocator(cp.cuda.malloc_managed)
+    return contextlib.nullcontext()
+
+
+def to_device(array, pinned=False, label=None, astype=None, cast=None, memory=None):
+    """
+    Copy ``array`` to the current device.
+
+    Arrays already in device memory are wrapped without a copy. With
+    ``pinned=True`` numpy arrays are first copied into a buffer from the
+    shared :class:`PinnedMemoryPool` so that the host-to-device copy runs at
+    full bandwidth instead of going through the driver's pageable staging.
+    ``label`` is the variable name reported to :mod:`cupy_xarray.telemetry`.
+
+    ``astype`` converts the data to another dtype, on the host before the
+    copy or on the device after it, see :func:`plan_cast`. Staged copies
+    convert while filling the staging buffer, at no extra cost.
+
+    ``memory`` selects the kind of memory copies are allocated from, see
+    :func:`device_allocation`.
+    """
+    with device_allocation(memory):
+        if is_device_array(array):
+            out = from_device_array(array)
+            return out if astype is None else out.astype(astype, copy=False)
+        wire, after = plan_cast(array.dtype, astype, cast, sender="host")
+        if pinned and isinstance(array, np.ndarray) and array.size:
+            staging = _pinned_pool.acquire(array.size * wire.itemsize)
+            try:
+                host = _stage(staging, array, wire)
+                out = cp.empty(array.shape, dtype=wire)
+                with telemetry.transfer(telemetry.HOST_TO_DEVICE, host, label):
+                    out.set(host)
+            finally:
+                _pinned_pool.release(staging)
+        else:
+            host = array if wire == array.dtype else np.asarray(array, dtype=wire)
+            with telemetry.transfer(telemetry.HOST_TO_DEVICE, host, label):
+                out = cp.asarray(host)
+        return out if after is None else out.astype(after)
+
+
+def block_device(placement, devices, location, numblocks):
+    """
+    Pick the device for the chunk at ``location`` of a grid of ``numblocks``.
+
+    ``placement`` is ``"round-robin"`` over the chunks in C order, an integer
+    axis along which chunk indices are assigned to devices in turn, or a
+    callable mapping the chunk location to a device id.
+    """
+    if callable(placement):
+        return placement(location)
+    if placement == "round-robin":
+        index = int(np.ravel_multi_index(location, numblocks)) if location else 0
+    else:
+        index = location[placement]
+    return devices[index % len(devices)]
+
+
+def to_device_placed(
+    block,
+    pinned=False,
+    placement=None,
+    devices=None,
+    label=None,
+    astype=None,
+    cast=None,
+    memory=None,
+    block_info=None,
+):
+    """
+    Copy a dask block to the device chosen by ``placement``.
+
+    Block function for :func:`dask.array.map_blocks`, see :func:`block_device`.
+    """
+    if block_info is None:
+        # called without dask block information, e.g. to infer meta
+        return to_device(block, pinned=pinned, label=label, astype=astype, cast=cast, memory=memory)
+    info = block_info[0]
+    device = block_device(placement, devices, info["chunk-location"], info["num-chunks"])
+    with cp.cuda.Device(device):
+        return to_device(block, pinned=pinned, label=label, astype=astype, cast=cast, memory=memory)
+
+
+# long-lived side streams of each device for ``to_device_many``
+_side_streams = {}
+_side_streams_lock = threading.Lock()
+
+
+def side_streams(n):
+    """Return ``n`` non-blocking streams of the current device, created once and kept."""
+    device = cp.cuda.Device().id
+    with _side_streams_lock:
+        streams = _side_streams.setdefault(device, [])
+        while len(streams) < n:
+            streams.append(cp.cuda.Stream(non_blocking=True))
+        return streams[:n]
+
+
+def to_device_many(arrays, n_streams, labels=None):
+    """
+    Copy a sequence of numpy arrays to the current device on a pool of streams.
+
+    Each array is packed into a pinned staging buffer and its copy queued on
+    the next stream in round-robin order, so host-side staging of one array
+    overlaps with the transfers of the previous ones. Staged bytes in flight
+    are bounded by the ``pinned_pool_size`` option: once exceeded, the stream
+    about to be reused is drained before more work is queued on it. All
+    streams are synchronized before returning. ``labels`` are the variable
+    names reported to :mod:`cupy_xarray.telemetry`.
+
+    The destinations are allocated on the current stream, and the copies
+    wait for the work queued on it, so that their memory returns to its
+    pool. The streams are kept for later calls, see :func:`side_streams`.
+    """
+    if labels is None:
+        labels = [None] * len(arrays)
+    out = [cp.empty(array.shape, dtype=array.dtype) for array in arrays]
+    ready = cp.cuda.get_current_stream().record()
+    streams = side_streams(n_streams)
+    for stream in streams:
+        stream.wait_event(ready)
+    in_flight = [[] for _ in range(n_streams)]
+    in_flight_bytes = 0
+    try:
+        for i, (array, dev, label) in enumerate(zip(arrays, out, labels, strict=True)):
+            slot = i % n_streams
+            stream = streams[slot]
+            if in_flight[slot] and in_flight_bytes + array.nbytes > _pinned_pool.max_bytes:
+                stream.synchronize()
+                for staging in in_flight[slot]:
+                    in_flight_bytes -= staging.nbytes
+                    _pinned_pool.release(staging)
+                in_flight[slot] = []
+            if array.nbytes:
+                staging = _pinned_pool.acquire(array.nbytes)
+                in_flight[slot].append(staging)
+                in_flight_bytes += staging.nbytes
+                with stream, telemetry.transfer(telemetry.HOST_TO_DEVICE, array, label):
+                    dev.set(_stage(staging, array), stream=stream)
+    finally:
+        for stream, staged in zip(streams, in_flight, strict=True):
+            stream.synchronize()
+            for staging in staged:
+                _pinned_pool.release(staging)
+    return out
+
+
+# byte alignment of each array inside a packed buffer
+_PACK_ALIGNMENT = 256
+
+
+def _packed_layout(arrays):
+    """Return the byte offset of each array in a packed buffer and its total size."""
+    offsets = []
+    total = 0
+    for array in arrays:
+        offsets.append(total)
+        total += -(-array.nbytes // _PACK_ALIGNMENT) * _PACK_ALIGNMENT
+    return offsets, total
+
+
+def _unpack(buffer, offset, shape, dtype):
+    """View the bytes of a packed ``buffer`` starting at ``offset`` as an array."""
+    nbytes = math.prod(shape) * dtype.itemsize
+    return buffer[offset : offset + nbytes].view(dtype).reshape(shape)
+
+
+def _packed_label(labels):
+    return None if labels is None else tuple(labels)
+
+
+def pack_to_device(arrays, labels=None):
+    """
+    Copy many small numpy arrays to the current device in a single transfer.
+
+    The arrays are packed into one pinned host buffer, moved with one copy
+    and handed back as views into the resulting device buffer, which they
+    keep alive between them. The single transfer is reported to
+    :mod:`cupy_xarray.telemetry` under the tuple of ``labels``.
+    """
+    offsets, total = _packed_layout(arrays)
+    packed = cp.empty(total, dtype=cp.uint8)
+    if total:
+        staging = _pinned_pool.acquire(total)
+        try:
+            for array, offset in zip(arrays, offsets, strict=True):
+                _stage(staging[offset : offset + array.nbytes], array)
+            with telemetry.transfer(telemetry.HOST_TO_DEVICE, staging, _packed_label(labels)):
+                packed.set(staging)
+        finally:
+            _pinned_pool.release(staging)
+    return [
+        _unpack(packed, offset, array.shape, array.dtype)
+        for array, offset in zip(arrays, offsets, strict=True)
+    ]
+
+
+def pack_to_host(arrays, labels=None):
+    """
+    Copy many small cupy arrays to the host in a single transfer.
+
+    The inverse of :func:`pack_to_device`: the arrays are gathered into one
+    device buffer, copied with one transfer and returned as views into the
+    resulting numpy buffer.
+    """
+    offsets, total = _packed_layout(arrays)
+    packed = cp.empty(total, dtype=cp.uint8)
+    for array, offset in zip(arrays, offsets, strict=True):
+        cp.copyto(_unpack(packed, offset, array.shape, array.dtype), array)
+    with telemetry.transfer(telemetry.DEVICE_TO_HOST, packed, _packed_label(labels)):
+        host = packed.get()
+    return [
+        _unpack(host, offset, array.shape, array.dtype)
+        for array, offset in zip(arrays, offsets, strict=True)
+    ]
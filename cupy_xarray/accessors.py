@@ -1,33 +1,450 @@
-import warnings
-from typing import TYPE_CHECKING, Any
-
-try:
-    import cupy as cp
-except ImportError as e:
-    warnings.warn(
-        "Cupy is not installed. cupy-xarray expects cupy to be manually installed. Please install "
-        "cupy by following the instructions at https://docs.cupy.dev/en/stable/install.html.",
-        ImportWarning,
-        stacklevel=2,
-    )
-    raise e
+import functools
+import itertools
+from collections.abc import Mapping
+from concurrent.futures import Future
+
+import numpy as np
 from xarray import (
     DataArray,
-    Dataset,
+    Variable,
     register_dataarray_accessor,
     register_dataset_accessor,
 )
+from xarray.core import indexing
+
+from ._cache import conversion_cache
+from ._compat import cp, is_cupy_array, is_dask_array, is_sparse_array
+from ._graph import cancel_round_trip, record_conversion
+from ._memory import advise_managed, fit_to_budget, prefetch_managed
+from ._prefetch import prefetch_to_device, region_loads
+from ._reduce import REDUCTIONS, Histogram, MinMax, default_slab_size, stream_reduce
+from ._sparse import device_coo, sparse_to_device, sparse_to_host
+from ._spill import managed_array
+from ._transfer import (
+    block_device,
+    device_allocation,
+    is_device_array,
+    map_future,
+    pack_to_device,
+    pack_to_host,
+    plan_cast,
+    to_device,
+    to_device_many,
+    to_device_placed,
+    to_host,
+    to_host_async,
+)
+from .backend import is_device_backed, lazy_device_array
+from .options import OPTIONS
+
+
+def _replace_data(obj, data):
+    """
+    Return a DataArray or Dataset like ``obj`` but backed by ``data``.
+
+    For Datasets ``data`` maps data variable names to their new data, the
+    other data variables keep theirs. The copy is shallow: coordinates,
+    indexes and attributes are not duplicated, no alignment happens and
+    each variable keeps its encoding.
+    """
+    if isinstance(obj, DataArray):
+        return obj.copy(deep=False, data=data)
+    data = {name: data.get(name, da.variable._data) for name, da in obj.data_vars.items()}
+    return obj.copy(deep=False, data=data)
+
+
+# Block functions passed to ``map_blocks`` are module-level functions with an
+# explicit ``meta``, so that converting the same array twice yields the same
+# task keys and dask never has to call them to infer the output type.
+
+
+def _device_meta(array, dtype=None):
+    return cp.empty((0,) * array.ndim, dtype=array.dtype if dtype is None else dtype)
+
+
+def _host_meta(array, dtype=None):
+    return np.empty((0,) * array.ndim, dtype=array.dtype if dtype is None else dtype)
+
+
+_CAST_OPTIONS = (None, "host", "device")
+
+
+def _check_cast(cast):
+    if cast not in _CAST_OPTIONS:
+        raise ValueError(f"cast must be one of {_CAST_OPTIONS!r}, got {cast!r}.")
+
+
+_MEMORY_OPTIONS = ("device", "managed")
+
+
+def _check_memory(memory, managed, cache):
+    if memory not in _MEMORY_OPTIONS:
+        raise ValueError(f"memory must be one of {_MEMORY_OPTIONS!r}, got {memory!r}.")
+    if managed and cache:
+        raise ValueError("managed and cache cannot be combined.")
+    if memory == "managed" and (managed or cache):
+        raise ValueError("memory='managed' cannot be combined with managed or cache.")
+
+
+def _variable_dtype(dtype, name):
+    """Pick the dtype for variable ``name`` from a single dtype or a mapping of them."""
+    if isinstance(dtype, Mapping):
+        return dtype.get(name)
+    return dtype
+
+
+def _placement_devices(devices):
+    if devices is None:
+        return tuple(range(cp.cuda.runtime.getDeviceCount()))
+    return tuple(devices)
+
+
+def _placement_policy(variable, placement):
+    """Translate a dimension name into the axis :func:`block_device` expects."""
+    if callable(placement) or placement == "round-robin":
+        return placement
+    if placement not in variable.dims:
+        raise ValueError(
+            f"placement must be 'round-robin', a dimension name or a callable, "
+            f"got {placement!r}. Dimensions are {variable.dims!r}."
+        )
+    return variable.get_axis_num(placement)
+
+
+def _dataset_placements(ds, placement, devices):
+    """
+    Return the placement and devices used for each data variable of ``ds``.
+
+    Only the chunks of dask-backed data variables are spread over the
+    devices. In-memory data variables, and with a dimension name as
+    ``placement`` those without that dimension, are put whole on one device
+    each, taking the devices in turn.
+    """
+    if placement is None or callable(placement):
+        return dict.fromkeys(ds.data_vars, (placement, devices))
+    if placement != "round-robin" and placement not in ds.dims:
+        raise ValueError(
+            f"placement must be 'round-robin', a dimension name or a callable, "
+            f"got {placement!r}. Dimensions are {tuple(ds.dims)!r}."
+        )
+    turn = itertools.count()
+    return {
+        var: (placement, devices)
+        if is_dask_array(variable._data)
+        and (placement == "round-robin" or placement in variable.dims)
+        else ("round-robin", (devices[next(turn) % len(devices)],))
+        for var, variable in ds.data_vars.variables.items()
+    }
+
+
+# Conversions work on Variables rather than DataArrays, so that converting a
+# Dataset only swaps the data of its variables and never rebuilds coordinates.
+
+
+def _variable_to_device(
+    variable,
+    name,
+    *,
+    pinned,
+    lazy,
+    placement,
+    devices,
+    dtype,
+    cast,
+    cache=False,
+    managed=False,
+    memory="device",
+):
+    """Return the data of ``variable`` moved to the GPU, see ``as_cupy``."""
+    data = variable._data
+    if dtype is not None and np.dtype(dtype) == variable.dtype:
+        dtype = None
+    if is_sparse_array(data):
+        with device_allocation(memory):
+            device = sparse_to_device(data, pinned=pinned, label=name, astype=dtype, cast=cast)
+        return indexing.LazilyIndexedArray(device)
+    coo = device_coo(data)
+    if coo is not None:
+        return indexing.LazilyIndexedArray(coo if dtype is None else coo.astype(dtype))
+    if lazy and not is_dask_array(data):
+        return lazy_device_array(
+            data, pinned=pinned, label=name, astype=dtype, cast=cast, memory=memory
+        )
+    policy = None if placement is None else _placement_policy(variable, placement)
+    if is_dask_array(data):
+        return _dask_to_device(data, name, pinned, policy, devices, dtype, cast, memory)
+    if policy is not None:
+        location = (0,) * variable.ndim
+        with cp.cuda.Device(block_device(policy, devices, location, (1,) * variable.ndim)):
+            device = to_device(
+                variable.data, pinned=pinned, label=name, astype=dtype, cast=cast, memory=memory
+            )
+    else:
+        device = _eager_to_device(variable.data, name, pinned, dtype, cast, cache, memory)
+    return managed_array(device, label=name) if managed else device
+
+
+def _dask_to_device(data, name, pinned, policy, devices, dtype, cast, memory):
+    if policy is not None:
+        return data.map_blocks(
+            to_device_placed,
+            pinned=pinned,
+            placement=policy,
+            devices=devices,
+            label=name,
+            astype=dtype,
+            cast=cast,
+            memory=memory,
+            meta=_device_meta(data, dtype),
+        )
+    # the recorded source may live in a different kind of memory
+    source = cancel_round_trip(data, "device") if dtype is None and memory == "device" else None
+    if source is not None:
+        return source
+    device = data.map_blocks(
+        to_device,
+        pinned=pinned,
+        label=name,
+        astype=dtype,
+        cast=cast,
+        memory=memory,
+        meta=_device_meta(data, dtype),
+    )
+    if dtype is None and memory == "device":
+        record_conversion(device, data, "device")
+    return device
+
+
+def _eager_to_device(array, name, pinned, dtype, cast, cache, memory):
+    if not (cache and isinstance(array, np.ndarray) and not is_device_array(array)):
+        return to_device(array, pinned=pinned, label=name, astype=dtype, cast=cast, memory=memory)
+    device = conversion_cache().get(array, dtype)
+    if device is None:
+        device = to_device(array, pinned=pinned, label=name, astype=dtype, cast=cast)
+        conversion_cache().put(array, device, dtype)
+    return device
+
+
+def _variable_to_host(variable, name, *, out=None, reuse=False, dtype=None):
+    """Return the cupy data of ``variable`` moved to the host, see ``as_numpy``."""
+    data = variable._data
+    if dtype is not None and np.dtype(dtype) == variable.dtype:
+        dtype = None
+    coo = device_coo(data)
+    if coo is not None:
+        if out is not None or reuse:
+            raise ValueError("out and reuse are not supported for sparse data.")
+        return sparse_to_host(coo, label=name, astype=dtype)
+    if is_dask_array(data):
+        if out is not None or reuse:
+            raise ValueError("out and reuse are not supported for dask-backed data.")
+        source = cancel_round_trip(data, "host") if dtype is None else None
+        if source is not None:
+            return source
+        host = data.map_blocks(to_host, label=name, astype=dtype, meta=_host_meta(data, dtype))
+        if dtype is None:
+            record_conversion(host, data, "host")
+        return host
+    return to_host(variable.data, out=out, reuse=reuse, label=name, astype=dtype)
+
+
+def _resolved(func, **kwargs):
+    """Call ``func`` now, returning its result or error as a done future."""
+    future = Future()
+    try:
+        future.set_result(func(**kwargs))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def _batched_to_device(ds, pack_threshold, streams, dtype, cast):
+    """
+    Move the numpy-backed data variables of ``ds`` with packed or multi-stream copies.
+
+    Returns a mapping of the variables moved to their device data.
+    """
+    data = {var: ds.variables[var].data for var in ds.data_vars}
+    eager = {var: arr for var, arr in data.items() if isinstance(arr, np.ndarray)}
+    # (dtype on the wire, dtype to convert to on the device) of each variable
+    casts = {
+        var: plan_cast(arr.dtype, _variable_dtype(dtype, var), cast) for var, arr in eager.items()
+    }
+
+    def wire(var):
+        return eager[var].astype(casts[var][0], copy=False)
+
+    converted = {}
+    if pack_threshold is not None:
+        small = [var for var, arr in eager.items() if arr.nbytes <= pack_threshold]
+        arrays = pack_to_device([wire(var) for var in small], labels=small)
+        converted.update(zip(small, arrays, strict=True))
+    if streams:
+        rest = [var for var in eager if var not in converted]
+        arrays = to_device_many([wire(var) for var in rest], streams, labels=rest)
+        converted.update(zip(rest, arrays, strict=True))
+    for var, arr in converted.items():
+        if casts[var][1] is not None:
+            converted[var] = arr.astype(casts[var][1])
+    return converted
+
+
+def _device_nbytes(variable):
+    """Bytes of device memory held by the data of ``variable``."""
+    data = variable._data
+    if is_dask_array(data):
+        if not is_cupy_array(data._meta):
+            return 0
+        # computed chunks of persisted arrays are stored in the graph itself, in
+        # materialized layers; materializing the others would build the whole graph
+        graph = data.__dask_graph__()
+        layers = getattr(graph, "layers", {data.name: graph})
+        arrays = [
+            array
+            for layer in layers.values()
+            if getattr(layer, "is_materialized", lambda: True)()
+            for array in layer.values()
+        ]
+    elif isinstance(data, indexing.ExplicitlyIndexed):
+        # managed and sparse arrays report what they hold, lazy ones hold nothing
+        return getattr(getattr(data, "array", None), "device_nbytes", 0)
+    else:
+        arrays = [data]
+    return sum({id(a): a.nbytes for a in arrays if is_cupy_array(a)}.values())
 
-if TYPE_CHECKING:
-    DuckArrayTypes = tuple[type[Any], ...]
-    dask_array_type: DuckArrayTypes
 
-try:
-    import dask.array
+def _chunk_regions(da):
+    """Yield the region of each chunk of ``da`` in C order, as a dict of slices."""
+    chunks = da.chunks or tuple((size,) for size in da.shape)
+    bounds = [np.cumsum((0, *sizes)) for sizes in chunks]
+    for index in np.ndindex(*(len(sizes) for sizes in chunks)):
+        yield {
+            dim: slice(int(b[i]), int(b[i + 1]))
+            for dim, b, i in zip(da.dims, bounds, index, strict=True)
+        }
 
-    dask_array_type = (dask.array.Array,)
-except ImportError:
-    dask_array_type = ()
+
+def _batch_indices(size, batch_size, shuffle, seed, drop_last):
+    """Yield the indices of each batch along a dimension of length ``size``."""
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1, got {batch_size!r}.")
+    order = np.random.default_rng(seed).permutation(size) if shuffle else None
+    for start in range(0, size, batch_size):
+        stop = min(start + batch_size, size)
+        if drop_last and stop - start < batch_size:
+            return
+        # shuffled batches are read in index order, which is faster on disk
+        yield slice(start, stop) if order is None else np.sort(order[start:stop])
+
+
+def _load_batch(ds, names, dim, index):
+    batch = ds[names].isel({dim: index}).compute()
+    return tuple(batch.variables[name].data for name in names)
+
+
+def _iter_batches(
+    ds, dim, batch_size, shuffle, seed, drop_last, prefetch, reuse, dtype, cast, label=None
+):
+    """
+    Yield device-backed batches of Dataset ``ds`` along ``dim``, see ``iter_batches``.
+
+    ``label`` replaces the variable names reported to the telemetry hooks,
+    for the temporary Dataset of a DataArray.
+    """
+    _check_cast(cast)
+    if dim not in ds.dims:
+        raise ValueError(f"{dim!r} is not a dimension, expected one of {tuple(ds.dims)!r}.")
+    batched = [name for name, var in ds.data_vars.variables.items() if dim in var.dims]
+    # data variables without ``dim`` are the same in every batch and copied once
+    static = {
+        name: to_device(
+            ds.variables[name].compute().data,
+            label=name if label is None else label,
+            astype=_variable_dtype(dtype, name),
+            cast=cast,
+        )
+        for name in ds.data_vars
+        if name not in batched
+    }
+    loads = (
+        (index, functools.partial(_load_batch, ds, batched, dim, index))
+        for index in _batch_indices(ds.sizes[dim], batch_size, shuffle, seed, drop_last)
+    )
+    coords = ds.coords.to_dataset()
+    for index, arrays in prefetch_to_device(
+        loads,
+        depth=prefetch,
+        reuse=reuse,
+        label=tuple(batched) if label is None else (label,) * len(batched),
+        astype=tuple(_variable_dtype(dtype, name) for name in batched),
+        cast=cast,
+    ):
+        data = {**dict(zip(batched, arrays, strict=True)), **static}
+        batch = coords.isel({dim: index}, missing_dims="ignore").assign(
+            {
+                name: Variable(var.dims, data[name], var.attrs, var.encoding)
+                for name, var in ds.data_vars.variables.items()
+            }
+        )
+        batch.attrs = dict(ds.attrs)
+        yield batch
+
+
+def _reduce_dims(da, dim):
+    if dim is None:
+        return da.dims
+    dims = tuple(dim) if isinstance(dim, list | tuple | set) else (dim,)
+    missing = [d for d in dims if d not in da.dims]
+    if missing:
+        raise ValueError(f"{missing!r} are not dimensions, expected some of {da.dims!r}.")
+    return dims
+
+
+def _histogram_edges(da, bins, range, skipna, slab_dim, size, prefetch, dtype):
+    """Bin edges as :func:`numpy.histogram` computes them for data of ``dtype``."""
+    if np.ndim(bins) == 1:
+        return np.asarray(bins)
+    if range is None:
+        # an extra streaming pass for the range of the data
+        low, high = stream_reduce(
+            da.variable, MinMax(skipna), da.dims, slab_dim, size, prefetch, astype=dtype
+        )
+        # scalars of the data's dtype, as numpy's edges are in that dtype
+        range = (low.get()[()], high.get()[()])
+    dtype = da.dtype if dtype is None else dtype
+    return np.histogram_bin_edges(np.empty(0, dtype=dtype), bins, range=range)
+
+
+def _stream_reduce(da, func, dim, skipna, ddof, bins, range, slab_dim, slab_size, prefetch, dtype):
+    """Reduce DataArray ``da`` on the device slab by slab, see ``reduce``."""
+    if func not in REDUCTIONS:
+        raise ValueError(f"func must be one of {tuple(REDUCTIONS)!r}, got {func!r}.")
+    dims = _reduce_dims(da, dim)
+    if func == "histogram" and set(dims) != set(da.dims):
+        raise ValueError("histogram reduces over all dimensions, use dim=None.")
+    if skipna is None:
+        skipna = da.dtype.kind in "fc"
+    if slab_dim is None and da.dims:
+        # slabs along the outermost dimension are contiguous in C order
+        slab_dim = da.dims[0]
+    if slab_size is None and slab_dim is not None:
+        slab_size = default_slab_size(da.variable, slab_dim, prefetch, dtype)
+    if func == "histogram":
+        edges = _histogram_edges(da, bins, range, skipna, slab_dim, slab_size, prefetch, dtype)
+        reduction = Histogram(cp.asarray(edges), skipna)
+    elif func in ("std", "var"):
+        reduction = REDUCTIONS[func](skipna, ddof)
+    else:
+        reduction = REDUCTIONS[func](skipna)
+    data = stream_reduce(
+        da.variable, reduction, dims, slab_dim, slab_size, prefetch, label=da.name, astype=dtype
+    )
+    if func == "histogram":
+        coords = {"bin_lower": ("bin", edges[:-1]), "bin_upper": ("bin", edges[1:])}
+        return DataArray(data, dims=("bin",), coords=coords, name=da.name)
+    coords = {name: c for name, c in da.coords.items() if not set(c.dims) & set(dims)}
+    remaining = [d for d in da.dims if d not in dims]
+    return DataArray(data, dims=remaining, coords=coords, name=da.name)
 
 
 @register_dataarray_accessor("cupy")
@@ -50,18 +467,108 @@ class CupyDataArrayAccessor:
         is_cupy: bool
             Whether the underlying data is a cupy array.
         """
-        if isinstance(self.da.data, dask_array_type):
-            return isinstance(self.da.data._meta, cp.ndarray)
-        return isinstance(self.da.data, cp.ndarray)
+        data = self.da.variable._data
+        if isinstance(data, indexing.ExplicitlyIndexed):
+            return is_device_backed(data)
+        if is_dask_array(data):
+            return is_cupy_array(data._meta)
+        return is_cupy_array(data)
 
-    def as_cupy(self):
+    def as_cupy(
+        self,
+        *,
+        pinned=None,
+        lazy=False,
+        over_budget=None,
+        placement=None,
+        devices=None,
+        dtype=None,
+        cast=None,
+        cache=False,
+        managed=False,
+        memory="device",
+    ):
         """
         Converts the DataArray's underlying array type to cupy.
 
         For DataArrays which are initially backed by numpy the data
         will be immediately cast to cupy and moved to the GPU. In the case
         that the data was originally a Dask array each chunk will be moved
-        to the GPU when the task graph is computed.
+        to the GPU when the task graph is computed. Data that already lives
+        on the GPU, such as arrays exposing ``__cuda_array_interface__`` or
+        CUDA ``__dlpack__`` producers, is wrapped without a copy. Converting
+        dask-backed data that was just moved off the GPU with ``as_numpy``
+        returns the original device-backed graph instead of adding a second
+        round of copies.
+
+        Data held in a pydata/sparse array stays sparse: only its non-zeros
+        are copied, and the device footprint scales with their number. The
+        result is indexed lazily, building dense cupy arrays of just the
+        regions that are computed or loaded, and :meth:`to_cupyx_sparse`
+        exposes two-dimensional data as a cupyx sparse matrix. The ``lazy``,
+        ``placement``, ``cache`` and ``managed`` options do not apply to
+        sparse data.
+
+        Parameters
+        ----------
+        pinned : bool, optional
+            Stage the host-to-device copy through a reusable pool of pinned
+            host buffers. Defaults to the ``pinned_staging`` option, see
+            :func:`cupy_xarray.set_options`.
+        lazy : bool, default: False
+            For DataArrays that are not backed by dask, return a lazily
+            indexed DataArray instead. Only the region touched by indexing,
+            computing or loading is read and copied to the GPU, so that e.g.
+            ``da.cupy.as_cupy(lazy=True).isel(time=0)`` transfers one slice.
+        over_budget : {"raise", "chunk", "ignore"}, optional
+            What to do if the estimated device footprint exceeds the device
+            memory budget: raise a ``MemoryError`` before copying anything,
+            rechunk with dask into chunks that fit, or copy anyway. For dask
+            arrays the footprint is that of the largest chunk. Defaults to the
+            ``over_budget`` option, see :func:`cupy_xarray.set_options`.
+        placement : {"round-robin"}, hashable or callable, optional
+            Spread the chunks of dask-backed data over several GPUs.
+            ``"round-robin"`` cycles through the devices in chunk order, the
+            name of a dimension assigns the chunks along that dimension to the
+            devices in turn, and a callable receives each chunk's location
+            (a tuple of chunk indices) and returns a device id. In-memory data
+            is treated as a single chunk. The policy is recorded in the
+            result's encoding, see :attr:`placement`.
+        devices : sequence of int, optional
+            Device ids used by ``placement``. Defaults to all visible devices.
+        dtype : dtype, optional
+            Convert the data to this dtype on the way to the GPU.
+        cast : {"host", "device"}, optional
+            Where the conversion to ``dtype`` happens. By default narrowing
+            conversions, e.g. float64 to float32, are made on the host so that
+            fewer bytes are copied, and widening ones on the device. With
+            ``pinned`` staging a host-side conversion is fused into the copy
+            into the staging buffer.
+        cache : bool, default: False
+            Hand back the device copy made by an earlier ``as_cupy(cache=True)``
+            of the same numpy data, instead of copying it again. Cached copies
+            are shared and must not be modified in place. They are dropped when
+            the host array is freed, and least recently used first beyond the
+            ``conversion_cache_size`` option. The host array is read-only while
+            cached, so that in-place writes raise instead of leaving a stale
+            copy, see :func:`cupy_xarray.clear_conversion_cache`.
+            Ignored for dask-backed, lazy and explicitly placed data.
+        managed : bool, default: False
+            Register the device copy with the spill manager: when a device
+            allocation would fail, the least recently used managed arrays are
+            moved to pinned host memory and transparently brought back on
+            their next access. Arrays taken from the DataArray before a spill
+            keep their device memory alive. Ignored for dask-backed and lazy
+            data, and cannot be combined with ``cache``. This replaces cupy's
+            allocator for the whole process with a wrapper around the current
+            one, see :func:`cupy_xarray.restore_allocator`.
+        memory : {"device", "managed"}, default: "device"
+            Kind of memory the device copy is allocated from. ``"managed"``
+            uses CUDA managed memory, which the driver pages between host and
+            device on demand. Arrays may then be larger than device memory, so
+            the ``over_budget`` check is skipped; see :meth:`prefetch` and
+            :meth:`advise` for steering the paging. Data already on the device
+            is not copied. Cannot be combined with ``managed`` or ``cache``.
 
         Returns
         -------
@@ -77,53 +584,501 @@ class CupyDataArrayAccessor:
         <class 'cupy.ndarray'>
 
         """
-        if isinstance(self.da.data, dask_array_type):
-            return DataArray(
-                data=self.da.data.map_blocks(cp.asarray),
-                coords=self.da.coords,
-                dims=self.da.dims,
-                name=self.da.name,
-                attrs=self.da.attrs,
-            )
-        return DataArray(
-            data=cp.asarray(self.da.data),
-            coords=self.da.coords,
-            dims=self.da.dims,
-            name=self.da.name,
-            attrs=self.da.attrs,
+        if pinned is None:
+            pinned = OPTIONS["pinned_staging"]
+        if over_budget is None:
+            over_budget = OPTIONS["over_budget"]
+        _check_cast(cast)
+        _check_memory(memory, managed, cache)
+        # managed memory is meant to oversubscribe the device
+        da = self.da if lazy or memory == "managed" else fit_to_budget(self.da, over_budget, dtype)
+        if placement is not None:
+            devices = _placement_devices(devices)
+        data = _variable_to_device(
+            da.variable,
+            da.name,
+            pinned=pinned,
+            lazy=lazy,
+            placement=placement,
+            devices=devices,
+            dtype=dtype,
+            cast=cast,
+            cache=cache,
+            managed=managed,
+            memory=memory,
         )
+        result = _replace_data(da, data)
+        if placement is not None:
+            result.encoding["cupy_placement"] = {"placement": placement, "devices": devices}
+        return result
 
-    def as_numpy(self):
+    @property
+    def placement(self):
         """
-        Converts the DataArray's underlying array type from cupy to numpy.
+        Device placement recorded by ``as_cupy(placement=...)``.
+
+        Returns
+        -------
+        placement: dict or None
+            The ``placement`` policy and ``devices`` used, or None if the data
+            was not placed explicitly.
+        """
+        return self.da.encoding.get("cupy_placement")
+
+    @property
+    def device_nbytes(self):
+        """
+        Bytes of device memory held by the DataArray's data.
+
+        Counts in-memory cupy data and the device chunks of persisted dask
+        arrays. Chunks that dask has yet to compute, lazily loaded data and
+        spilled managed data are not counted.
+
+        Returns
+        -------
+        nbytes: int
+            Device bytes held by the data.
+        """
+        return _device_nbytes(self.da.variable)
+
+    def persist(self, **kwargs):
+        """
+        Compute the DataArray's dask chunks on the device and keep them there.
+
+        Data that is not on the device yet is converted with :meth:`as_cupy`
+        first, so later computations start from device-resident chunks
+        instead of reading and transferring the source again. Data that is
+        not dask-backed is returned on the device unchanged.
+
+        Parameters
+        ----------
+        **kwargs
+            Passed on to :meth:`xarray.DataArray.persist`.
 
         Returns
         -------
         da: DataArray
-            DataArray with underlying data cast to numpy.
+            DataArray whose dask graph points at the computed device chunks.
+            Their footprint is reported by :attr:`device_nbytes`.
+        """
+        da = self.da if self.is_cupy else self.as_cupy()
+        return da.persist(**kwargs)
+
+    def iter_chunks(self, *, prefetch=2, reuse=False, dtype=None, cast=None):
+        """
+        Iterate over the DataArray's chunks on the GPU, copying ahead of use.
+
+        With ``as_cupy`` each chunk is copied to the GPU inside the dask task
+        that goes on to compute on it, so the GPU waits for the copy and the
+        bus idles during the computation. Here a background thread computes
+        the chunks on the host and copies them to the GPU on a separate
+        stream while the caller works on earlier chunks, so that a streaming
+        computation takes about as long as the slower of the two instead of
+        their sum. Data that is not backed by dask is a single chunk.
+
+        Parameters
+        ----------
+        prefetch : int, default: 2
+            Number of chunks on the GPU at a time, counting the one being
+            worked on. The default double-buffers; larger values smooth out
+            chunks that are uneven to load, and ``1`` disables the overlap.
+        reuse : bool, default: False
+            Copy into a ring of ``prefetch`` device buffers instead of
+            allocating new ones. A chunk is then only valid until the next
+            one is requested.
+        dtype : dtype, optional
+            Convert the chunks to this dtype on the way to the GPU.
+        cast : {"host", "device"}, optional
+            Where the conversion to ``dtype`` happens.
+            See :meth:`as_cupy`.
+
+        Yields
+        ------
+        region : dict of hashable to slice
+            Position of the chunk, as accepted by :meth:`xarray.DataArray.isel`.
+        chunk : DataArray
+            The chunk, backed by a cupy array.
+
+        Examples
+        --------
+        >>> total = 0.0
+        >>> for region, chunk in da.cupy.iter_chunks(prefetch=3):
+        ...     total += float(chunk.sum())
+        """
+        _check_cast(cast)
+        da = self.da
+        loads = region_loads(da.variable, _chunk_regions(da))
+        for region, data in prefetch_to_device(
+            loads, depth=prefetch, reuse=reuse, label=da.name, astype=dtype, cast=cast
+        ):
+            yield region, _replace_data(da.isel(region), data)
+
+    def iter_batches(
+        self,
+        dim,
+        batch_size,
+        *,
+        shuffle=False,
+        seed=None,
+        drop_last=False,
+        prefetch=2,
+        reuse=False,
+        dtype=None,
+        cast=None,
+    ):
+        """
+        Iterate over batches along a dimension on the GPU, copying ahead of use.
+
+        Each batch is read and computed on the host by a pool of background
+        threads, then copied to the GPU through pinned memory on a separate
+        stream, while the caller works on earlier batches. Intended for
+        feeding training loops, e.g. with batches of time steps.
+
+        Parameters
+        ----------
+        dim : hashable
+            Dimension to batch along.
+        batch_size : int
+            Number of elements along ``dim`` in each batch.
+        shuffle : bool, default: False
+            Assign the elements to batches in random order. The elements of
+            each batch are read in their original order.
+        seed : int or numpy.random.Generator, optional
+            Seed or generator for ``shuffle``.
+        drop_last : bool, default: False
+            Skip the last batch if it has fewer than ``batch_size`` elements.
+        prefetch : int, default: 2
+            Number of batches on the GPU at a time, counting the one being
+            worked on. See :meth:`iter_chunks`.
+        reuse : bool, default: False
+            Copy into a ring of ``prefetch`` device buffers instead of
+            allocating new ones. A batch is then only valid until the next
+            one is requested.
+        dtype : dtype, optional
+            Convert the batches to this dtype on the way to the GPU.
+        cast : {"host", "device"}, optional
+            Where the conversion to ``dtype`` happens.
+            See :meth:`as_cupy`.
+
+        Yields
+        ------
+        batch : DataArray
+            The batch, backed by a cupy array.
+
+        Examples
+        --------
+        >>> for batch in da.cupy.iter_batches("time", 32, shuffle=True, seed=0):
+        ...     loss = train_step(batch.data)
+        """
+        da = self.da
+        for batch in _iter_batches(
+            da._to_temp_dataset(),
+            dim,
+            batch_size,
+            shuffle,
+            seed,
+            drop_last,
+            prefetch,
+            reuse,
+            dtype,
+            cast,
+            label=da.name,
+        ):
+            yield da._from_temp_dataset(batch)
+
+    def reduce(
+        self,
+        func,
+        dim=None,
+        *,
+        skipna=None,
+        ddof=0,
+        bins=10,
+        range=None,
+        slab_dim=None,
+        slab_size=None,
+        prefetch=2,
+        dtype=None,
+    ):
+        """
+        Reduce the DataArray on the GPU, streaming it through in slabs.
+
+        For data that does not fit on the GPU. Slabs along ``slab_dim`` are
+        read on the host and copied to the GPU ahead of use, as in
+        :meth:`iter_chunks`, and each is reduced as soon as it arrives. If
+        ``slab_dim`` is reduced, the partial results of the slabs are merged
+        on the GPU: sums and counts for means, counts, means and sums of
+        squared deviations for variances, and so on. Only ``prefetch`` slabs
+        and the partial results are held on the GPU, and no dask graph is
+        built.
+
+        Parameters
+        ----------
+        func : {"sum", "count", "mean", "var", "std", "min", "max", "histogram"}
+            Reduction to compute.
+        dim : hashable or sequence of hashable, optional
+            Dimensions to reduce over. Defaults to all dimensions, which
+            ``"histogram"`` requires.
+        skipna : bool, optional
+            Skip missing values. Defaults to True for float data.
+        ddof : int, default: 0
+            Delta degrees of freedom of ``"var"`` and ``"std"``.
+        bins : int or sequence of scalar, default: 10
+            Number of equal-width bins of ``"histogram"``, or their edges.
+        range : (float, float), optional
+            Lower and upper edge of the ``"histogram"`` bins. Defaults to the
+            minimum and maximum of the data, found in an extra pass.
+        slab_dim : hashable, optional
+            Dimension to cut the slabs along. Defaults to the first dimension,
+            along which slabs are contiguous in memory.
+        slab_size : int, optional
+            Number of elements along ``slab_dim`` in each slab. Defaults to
+            the size at which the slabs held at a time take half of the device
+            memory budget, see :func:`cupy_xarray.set_options`.
+        prefetch : int, default: 2
+            Number of slabs on the GPU at a time. See :meth:`iter_chunks`.
+        dtype : dtype, optional
+            Convert the slabs to this dtype on the way to the GPU.
+
+        Returns
+        -------
+        reduced: DataArray
+            The result, backed by a cupy array. Histograms have a ``bin``
+            dimension with ``bin_lower`` and ``bin_upper`` coordinates.
+
+        Examples
+        --------
+        >>> da.cupy.reduce("mean", dim="time")
+        >>> da.cupy.reduce("histogram", bins=50, range=(200, 320))
         """
+        return _stream_reduce(
+            self.da, func, dim, skipna, ddof, bins, range, slab_dim, slab_size, prefetch, dtype
+        )
+
+    def as_numpy(self, *, out=None, reuse=False, dtype=None, blocking=True):
+        """
+        Converts the DataArray's underlying array type from cupy to numpy.
+
+        Sparse data moved to the GPU by :meth:`as_cupy` is returned as a
+        pydata/sparse COO array, copying only its non-zeros.
+
+        With ``blocking=False`` the copy is only started, and a future of the
+        result is returned instead. The copy waits for the kernels queued so
+        far on the current stream, then runs on a side stream into pinned
+        memory while the caller goes on to queue the next ones. Dask-backed
+        and sparse data are converted right away, returning a done future.
+
+        Parameters
+        ----------
+        out : numpy.ndarray, optional
+            Preallocated C-contiguous array, ideally in pinned memory, to copy
+            the data into. Not supported for dask-backed data.
+        reuse : bool, default: False
+            Copy into a cached pinned buffer for this shape and dtype instead
+            of allocating a new array. The buffer is shared with, and
+            overwritten by, later calls for the same shape and dtype.
+        dtype : dtype, optional
+            Convert the data to this dtype on the way to the host. Widening
+            conversions, e.g. float32 to float64, are made after the copy and
+            narrowing ones before it, so that fewer bytes are copied. Cannot be
+            combined with ``out``.
+        blocking : bool, default: True
+            Wait for the copy to complete. If False, the data must not be
+            modified until the returned future is done.
+
+        Returns
+        -------
+        da: DataArray or concurrent.futures.Future
+            DataArray with underlying data cast to numpy, or a future of it
+            with ``blocking=False``.
+
+        See Also
+        --------
+        as_numpy_async
+        """
+        if dtype is not None and out is not None:
+            raise ValueError("dtype cannot be combined with out.")
+        if not blocking:
+            data = self.da.variable._data
+            if not self.is_cupy or is_dask_array(data) or device_coo(data) is not None:
+                return _resolved(self.as_numpy, out=out, reuse=reuse, dtype=dtype)
+            future = to_host_async(
+                self.da.data, out=out, reuse=reuse, label=self.da.name, astype=dtype
+            )
+            return map_future(future, functools.partial(_replace_data, self.da))
         if self.is_cupy:
-            if isinstance(self.da.data, dask_array_type):
-                return DataArray(
-                    data=self.da.data.map_blocks(
-                        lambda block: block.get(), dtype=self.da.data._meta.dtype
-                    ),
-                    coords=self.da.coords,
-                    dims=self.da.dims,
-                    name=self.da.name,
-                    attrs=self.da.attrs,
-                )
-            return DataArray(
-                data=self.da.data.get(),
-                coords=self.da.coords,
-                dims=self.da.dims,
-                name=self.da.name,
-                attrs=self.da.attrs,
+            data = _variable_to_host(
+                self.da.variable, self.da.name, out=out, reuse=reuse, dtype=dtype
+            )
+            return _replace_data(self.da, data)
+        if out is not None:
+            np.copyto(out, self.da.as_numpy().data)
+            return _replace_data(self.da, out)
+        da = self.da.as_numpy()
+        return da if dtype is None else da.astype(dtype)
+
+    async def as_numpy_async(self, *, out=None, reuse=False, dtype=None):
+        """
+        Convert the DataArray's data from cupy to numpy without blocking the event loop.
+
+        Awaitable version of :meth:`as_numpy` with ``blocking=False``.
+
+        Examples
+        --------
+        >>> da = await gda.cupy.as_numpy_async()
+        """
+        import asyncio
+
+        future = self.as_numpy(out=out, reuse=reuse, dtype=dtype, blocking=False)
+        return await asyncio.wrap_future(future)
+
+    def get(self, *, out=None, reuse=False, blocking=True):
+        """
+        Copy the DataArray's cupy data to a numpy array.
+
+        Parameters
+        ----------
+        out : numpy.ndarray, optional
+            Preallocated C-contiguous array, ideally in pinned memory, to copy
+            the data into.
+        reuse : bool, default: False
+            Copy into a cached pinned buffer for this shape and dtype instead
+            of allocating a new array, see :meth:`as_numpy`.
+        blocking : bool, default: True
+            Wait for the copy to complete, or return a future of the copied
+            data, see :meth:`as_numpy`.
+
+        Returns
+        -------
+        arr: numpy.ndarray or concurrent.futures.Future
+            The copied data; ``out`` if given. Data that is not on the GPU is
+            returned as is, or copied into ``out``.
+        """
+        if not self.is_cupy:
+            data = self.da.to_numpy()
+            if out is not None:
+                np.copyto(out, data)
+                data = out
+            return data if blocking else _resolved(lambda: data)
+        if not blocking:
+            return to_host_async(self.da.data, out=out, reuse=reuse, label=self.da.name)
+        return to_host(self.da.data, out=out, reuse=reuse, label=self.da.name)
+
+    def to_dlpack(self, stream=None):
+        """
+        Export the DataArray's device data as a DLPack capsule without copying.
+
+        Parameters
+        ----------
+        stream : int, optional
+            Stream of the consumer, following the ``__dlpack__`` protocol.
+            Pending work on cupy's current stream is ordered before it.
+
+        Returns
+        -------
+        capsule: PyCapsule
+            DLPack capsule referencing the DataArray's device memory.
+        """
+        return self._device_data().__dlpack__(stream=stream)
+
+    def to_torch(self):
+        """
+        Export the DataArray's device data as a PyTorch tensor without copying.
+
+        Returns
+        -------
+        tensor: torch.Tensor
+            CUDA tensor sharing memory with the DataArray.
+        """
+        try:
+            import torch
+        except ImportError as e:
+            raise ImportError("to_torch requires PyTorch to be installed.") from e
+        return torch.from_dlpack(self._device_data())
+
+    def prefetch(self, device=None, stream=None):
+        """
+        Migrate the DataArray's managed memory ahead of its use.
+
+        Requires data allocated with ``as_cupy(memory="managed")``.
+
+        Parameters
+        ----------
+        device : int or "host", optional
+            Device id to migrate the data to, or ``"host"`` to move it to host
+            memory. Defaults to the current device.
+        stream : cupy.cuda.Stream, optional
+            Stream the migration is ordered on. Defaults to cupy's current
+            stream.
+
+        Returns
+        -------
+        da: DataArray
+            The DataArray itself, so that calls can be chained.
+        """
+        prefetch_managed(self._device_data("Prefetching"), device=device, stream=stream)
+        return self.da
+
+    def advise(self, advice, device=None, unset=False):
+        """
+        Tell the driver how the DataArray's managed memory will be used.
+
+        Requires data allocated with ``as_cupy(memory="managed")``.
+
+        Parameters
+        ----------
+        advice : {"read_mostly", "preferred_location", "accessed_by"}
+            ``"read_mostly"`` lets devices keep read-only copies of the pages,
+            ``"preferred_location"`` keeps the pages on ``device`` where
+            possible, and ``"accessed_by"`` maps them for ``device`` so that
+            its accesses do not page data back and forth.
+        device : int or "host", optional
+            Device id the advice refers to, or ``"host"``. Defaults to the
+            current device.
+        unset : bool, default: False
+            Withdraw earlier advice instead of giving it.
+
+        Returns
+        -------
+        da: DataArray
+            The DataArray itself, so that calls can be chained.
+        """
+        advise_managed(self._device_data("Advising"), advice, device=device, unset=unset)
+        return self.da
+
+    def to_cupyx_sparse(self, format="coo"):
+        """
+        Export two-dimensional sparse device data as a cupyx sparse matrix.
+
+        Requires data that was held in a pydata/sparse array with a fill
+        value of 0 and moved to the GPU with :meth:`as_cupy`. The first
+        dimension becomes the rows of the matrix.
+
+        Parameters
+        ----------
+        format : {"coo", "csr", "csc"}, default: "coo"
+            Sparse format of the matrix.
+
+        Returns
+        -------
+        matrix: cupyx.scipy.sparse.spmatrix
+            Matrix of the non-zeros.
+        """
+        coo = device_coo(self.da.variable._data)
+        if coo is None:
+            raise TypeError(
+                "to_cupyx_sparse requires sparse data moved to the GPU with `.cupy.as_cupy()`."
             )
-        return self.da.as_numpy()
+        return coo.to_cupyx(format)
 
-    def get(self):
-        return self.da.data.get()
+    def _device_data(self, action="Exporting"):
+        if is_dask_array(self.da.data) or not self.is_cupy:
+            raise TypeError(
+                f"{action} requires a DataArray backed by an in-memory cupy array, "
+                f"got {type(self.da.data).__name__}. Use `.cupy.as_cupy()` and "
+                "`.compute()` first."
+            )
+        return self.da.data
 
 
 @register_dataset_accessor("cupy")
@@ -148,26 +1103,350 @@ class CupyDatasetAccessor:
         """
         return all(da.cupy.is_cupy for da in self.ds.data_vars.values())
 
-    def as_cupy(self):
+    def as_cupy(
+        self,
+        *,
+        pinned=None,
+        streams=None,
+        pack_threshold=None,
+        lazy=False,
+        over_budget=None,
+        placement=None,
+        devices=None,
+        dtype=None,
+        cast=None,
+        cache=False,
+        managed=False,
+        memory="device",
+    ):
         """
         Convert the Dataset's underlying array type to cupy.
+
+        Parameters
+        ----------
+        pinned : bool, optional
+            Stage host-to-device copies through pinned host memory.
+            See :meth:`cupy_xarray.CupyDataArrayAccessor.as_cupy`.
+        streams : int, optional
+            Number of CUDA streams to spread the copies of numpy-backed data
+            variables over. Each variable is staged through pinned memory and
+            its copy queued asynchronously, so that preparing the next variable
+            on the host overlaps with transfers already in flight. The streams
+            are synchronized once before returning. Dask-backed variables are
+            not affected.
+        pack_threshold : int, optional
+            Numpy-backed data variables of at most this many bytes are packed
+            into a single host buffer and moved to the GPU with one copy. The
+            resulting arrays are views into one shared device buffer.
+        lazy : bool, default: False
+            Return lazily indexed data variables that are copied to the GPU
+            region by region on access, see
+            :meth:`cupy_xarray.CupyDataArrayAccessor.as_cupy`. Takes
+            precedence over ``streams`` and ``pack_threshold``.
+        over_budget : {"raise", "chunk", "ignore"}, optional
+            What to do if the estimated device footprint of all data variables
+            together exceeds the device memory budget. With ``"chunk"`` all
+            data variables are rechunked with dask. See
+            :meth:`cupy_xarray.CupyDataArrayAccessor.as_cupy`.
+        placement : {"round-robin"}, hashable or callable, optional
+            Multi-GPU placement policy applied to each data variable that is
+            not moved by ``streams`` or ``pack_threshold``. Only the chunks of
+            dask-backed data variables are spread over the devices: in-memory
+            data variables, and with a dimension name those without that
+            dimension, are put whole on one device each, cycling through
+            ``devices``.
+            See :meth:`cupy_xarray.CupyDataArrayAccessor.as_cupy`.
+        devices : sequence of int, optional
+            Device ids used by ``placement``. Defaults to all visible devices.
+        dtype : dtype or mapping of hashable to dtype, optional
+            Convert the data variables to this dtype on the way to the GPU, or
+            only those in a mapping of variable names to dtypes.
+        cast : {"host", "device"}, optional
+            Where the conversion to ``dtype`` happens.
+            See :meth:`cupy_xarray.CupyDataArrayAccessor.as_cupy`.
+        cache : bool, default: False
+            Reuse earlier device copies of data variables that are not moved
+            by ``streams`` or ``pack_threshold``.
+            See :meth:`cupy_xarray.CupyDataArrayAccessor.as_cupy`.
+        managed : bool, default: False
+            Let data variables that are not moved by ``streams`` or
+            ``pack_threshold`` be spilled to host memory under memory pressure.
+            See :meth:`cupy_xarray.CupyDataArrayAccessor.as_cupy`.
+        memory : {"device", "managed"}, default: "device"
+            Kind of memory the data variables are allocated from.
+            See :meth:`cupy_xarray.CupyDataArrayAccessor.as_cupy`.
+        """
+        if pinned is None:
+            pinned = OPTIONS["pinned_staging"]
+        if over_budget is None:
+            over_budget = OPTIONS["over_budget"]
+        _check_cast(cast)
+        _check_memory(memory, managed, cache)
+        if placement is not None:
+            devices = _placement_devices(devices)
+        ds = self.ds
+        converted = {}
+        if not lazy:
+            if memory != "managed":
+                ds = fit_to_budget(ds, over_budget, dtype)
+            if pack_threshold is not None or streams:
+                with device_allocation(memory):
+                    converted = _batched_to_device(ds, pack_threshold, streams, dtype, cast)
+        placements = _dataset_placements(ds, placement, devices)
+        data = {
+            var: converted[var]
+            if var in converted
+            else _variable_to_device(
+                ds.variables[var],
+                var,
+                pinned=pinned,
+                lazy=lazy,
+                placement=placements[var][0],
+                devices=placements[var][1],
+                dtype=_variable_dtype(dtype, var),
+                cast=cast,
+                cache=cache,
+                managed=managed,
+                memory=memory,
+            )
+            for var in ds.data_vars
+        }
+        result = _replace_data(ds, data)
+        if placement is not None:
+            for var in data.keys() - converted.keys():
+                var_placement, var_devices = placements[var]
+                result.variables[var].encoding["cupy_placement"] = {
+                    "placement": var_placement,
+                    "devices": var_devices,
+                }
+        return result
+
+    def prefetch(self, device=None, stream=None):
+        """
+        Migrate the managed memory of the Dataset's data variables ahead of their use.
+
+        See :meth:`cupy_xarray.CupyDataArrayAccessor.prefetch`.
+        """
+        for da in self.ds.data_vars.values():
+            da.cupy.prefetch(device=device, stream=stream)
+        return self.ds
+
+    def advise(self, advice, device=None, unset=False):
+        """
+        Tell the driver how the managed memory of the data variables will be used.
+
+        See :meth:`cupy_xarray.CupyDataArrayAccessor.advise`.
+        """
+        for da in self.ds.data_vars.values():
+            da.cupy.advise(advice, device=device, unset=unset)
+        return self.ds
+
+    @property
+    def device_nbytes(self):
         """
-        data_vars = {var: da.as_cupy() for var, da in self.ds.data_vars.items()}
-        return Dataset(data_vars=data_vars, coords=self.ds.coords, attrs=self.ds.attrs)
+        Bytes of device memory held by the Dataset's data variables.
 
-    def as_numpy(self):
+        See :attr:`cupy_xarray.CupyDataArrayAccessor.device_nbytes`.
+        """
+        return sum(_device_nbytes(self.ds.variables[var]) for var in self.ds.data_vars)
+
+    def persist(self, **kwargs):
+        """
+        Compute the Dataset's dask chunks on the device and keep them there.
+
+        See :meth:`cupy_xarray.CupyDataArrayAccessor.persist`.
+
+        Parameters
+        ----------
+        **kwargs
+            Passed on to :meth:`xarray.Dataset.persist`.
+
+        Returns
+        -------
+        ds: Dataset
+            Dataset whose dask graphs point at the computed device chunks.
+        """
+        ds = self.ds if self.is_cupy else self.as_cupy()
+        return ds.persist(**kwargs)
+
+    def iter_batches(
+        self,
+        dim,
+        batch_size,
+        *,
+        shuffle=False,
+        seed=None,
+        drop_last=False,
+        prefetch=2,
+        reuse=False,
+        dtype=None,
+        cast=None,
+    ):
+        """
+        Iterate over batches along a dimension on the GPU, copying ahead of use.
+
+        Data variables along ``dim`` are read, computed and copied together
+        for each batch; the others are copied once and shared by all batches.
+        See :meth:`cupy_xarray.CupyDataArrayAccessor.iter_batches`.
+
+        Parameters
+        ----------
+        dim : hashable
+            Dimension to batch along.
+        batch_size : int
+            Number of elements along ``dim`` in each batch.
+        shuffle : bool, default: False
+            Assign the elements to batches in random order.
+        seed : int or numpy.random.Generator, optional
+            Seed or generator for ``shuffle``.
+        drop_last : bool, default: False
+            Skip the last batch if it has fewer than ``batch_size`` elements.
+        prefetch : int, default: 2
+            Number of batches on the GPU at a time, counting the one being
+            worked on.
+        reuse : bool, default: False
+            Copy into a ring of ``prefetch`` sets of device buffers instead of
+            allocating new ones. A batch is then only valid until the next one
+            is requested.
+        dtype : dtype or mapping of hashable to dtype, optional
+            Convert the data variables to this dtype on the way to the GPU, or
+            only those in a mapping of variable names to dtypes.
+        cast : {"host", "device"}, optional
+            Where the conversion to ``dtype`` happens.
+            See :meth:`cupy_xarray.CupyDataArrayAccessor.as_cupy`.
+
+        Yields
+        ------
+        batch : Dataset
+            The batch, with data variables backed by cupy arrays.
+        """
+        yield from _iter_batches(
+            self.ds, dim, batch_size, shuffle, seed, drop_last, prefetch, reuse, dtype, cast
+        )
+
+    def reduce(
+        self,
+        func,
+        dim=None,
+        *,
+        skipna=None,
+        ddof=0,
+        bins=10,
+        range=None,
+        slab_dim=None,
+        slab_size=None,
+        prefetch=2,
+        dtype=None,
+    ):
+        """
+        Reduce each data variable on the GPU, streaming it through in slabs.
+
+        Data variables are reduced over the dimensions of ``dim`` they have,
+        and returned unchanged if they have none of them.
+        See :meth:`cupy_xarray.CupyDataArrayAccessor.reduce`.
+
+        Parameters
+        ----------
+        func : {"sum", "count", "mean", "var", "std", "min", "max", "histogram"}
+            Reduction to compute.
+        dim : hashable or sequence of hashable, optional
+            Dimensions to reduce over. Defaults to all dimensions.
+        skipna : bool, optional
+            Skip missing values. Defaults to True for float data.
+        ddof : int, default: 0
+            Delta degrees of freedom of ``"var"`` and ``"std"``.
+        bins : int or sequence of scalar, default: 10
+            Number of equal-width bins of ``"histogram"``, or their edges.
+        range : (float, float), optional
+            Lower and upper edge of the ``"histogram"`` bins. Required for a
+            number of ``bins``, so that all data variables share the bins.
+        slab_dim : hashable, optional
+            Dimension to cut the slabs along. Defaults to the first dimension
+            of each data variable.
+        slab_size : int, optional
+            Number of elements along ``slab_dim`` in each slab.
+        prefetch : int, default: 2
+            Number of slabs on the GPU at a time.
+        dtype : dtype or mapping of hashable to dtype, optional
+            Convert the data variables to this dtype on the way to the GPU, or
+            only those in a mapping of variable names to dtypes.
+
+        Returns
+        -------
+        reduced: Dataset
+            The results, backed by cupy arrays.
+        """
+        if func == "histogram" and range is None and np.ndim(bins) != 1:
+            raise ValueError("Histograms of a Dataset need a range or the edges of the bins.")
+        dims = self.ds.dims if dim is None else _reduce_dims(self.ds, dim)
+        reduced = {}
+        for name, da in self.ds.data_vars.items():
+            var_dims = [d for d in dims if d in da.dims]
+            if not var_dims:
+                reduced[name] = da
+                continue
+            reduced[name] = _stream_reduce(
+                da,
+                func,
+                var_dims,
+                skipna,
+                ddof,
+                bins,
+                range,
+                slab_dim if slab_dim in da.dims else None,
+                slab_size,
+                prefetch,
+                _variable_dtype(dtype, name),
+            )
+        # keep the attributes, encoding and untouched coordinates of the Dataset
+        gone = [name for name, var in self.ds.variables.items() if set(var.dims) & set(dims)]
+        result = self.ds.drop_vars(gone).assign(reduced)
+        return result[list(self.ds.data_vars)]
+
+    def as_numpy(self, *, pack_threshold=None, dtype=None):
         """
         Converts the Dataset's underlying array type from cupy to numpy.
+
+        Parameters
+        ----------
+        pack_threshold : int, optional
+            Cupy-backed data variables of at most this many bytes are gathered
+            into a single device buffer and moved to the host with one copy.
+            The resulting arrays are views into one shared numpy buffer.
+        dtype : dtype or mapping of hashable to dtype, optional
+            Convert the data variables to this dtype on the way to the host, or
+            only those in a mapping of variable names to dtypes.
+            See :meth:`cupy_xarray.CupyDataArrayAccessor.as_numpy`.
         """
         if self.is_cupy:
-            data_vars = {var: da.cupy.as_numpy() for var, da in self.ds.data_vars.items()}
-            return Dataset(
-                data_vars=data_vars,
-                coords=self.ds.coords,
-                attrs=self.ds.attrs,
-            )
+            converted = {}
+            if pack_threshold is not None:
+                small = [
+                    var
+                    for var, variable in self.ds.data_vars.variables.items()
+                    if is_cupy_array(variable._data) and variable.nbytes <= pack_threshold
+                ]
+                arrays = pack_to_host([self.ds[var].data for var in small], labels=small)
+                for var, arr in zip(small, arrays, strict=True):
+                    var_dtype = _variable_dtype(dtype, var)
+                    converted[var] = arr if var_dtype is None else arr.astype(var_dtype)
+            data = {
+                var: converted[var]
+                if var in converted
+                else _variable_to_host(
+                    self.ds.variables[var], var, dtype=_variable_dtype(dtype, var)
+                )
+                for var in self.ds.data_vars
+            }
+            return _replace_data(self.ds, data)
         else:
-            return self.ds.as_numpy()
+            ds = self.ds.as_numpy()
+            if dtype is None:
+                return ds
+            dtypes = {var: _variable_dtype(dtype, var) for var in ds.data_vars}
+            return ds.assign(
+                {var: ds[var].astype(dt) for var, dt in dtypes.items() if dt is not None}
+            )
 
 
 # Attach the `as_cupy` methods to the top level `Dataset` and `Dataarray` objects.
@@ -0,0 +1,202 @@
+import os
+
+import numpy as np
+import xarray as xr
+from xarray.backends import BackendArray, BackendEntrypoint
+from xarray.core import indexing
+
+from ._compat import is_cupy_array
+from ._sparse import DeviceCOOArray
+from ._spill import SpillableArray
+from ._transfer import to_device
+
+
+class DeviceBackendArray(BackendArray):
+    """
+    Lazily indexed array that moves only the indexed region to the GPU.
+
+    Wraps a host-side array, usually the lazily loaded data of a Variable
+    opened from disk. Indexing reads just the requested region from the
+    wrapped array and copies that region to the device.
+
+    Parameters
+    ----------
+    array : array-like
+        Host array supporting xarray's explicit indexing, or any array
+        :func:`xarray.core.indexing.as_indexable` can wrap.
+    pinned : bool, default: False
+        Stage the host-to-device copies through pinned host memory.
+    label : hashable, optional
+        Variable name reported to :mod:`cupy_xarray.telemetry` hooks.
+    astype : dtype, optional
+        Dtype the data is converted to as it is moved to the GPU.
+    cast : {"host", "device"}, optional
+        Side of the copy the conversion to ``astype`` happens on, see
+        :func:`cupy_xarray._transfer.plan_cast`.
+    memory : {"device", "managed"}, optional
+        Kind of memory the device copies are allocated from, see
+        :func:`cupy_xarray._transfer.device_allocation`.
+    """
+
+    __slots__ = ("array", "astype", "cast", "dtype", "label", "memory", "pinned", "shape")
+
+    def __init__(self, array, pinned=False, label=None, astype=None, cast=None, memory=None):
+        self.array = indexing.as_indexable(array)
+        self.shape = array.shape
+        self.dtype = array.dtype if astype is None else np.dtype(astype)
+        self.pinned = pinned
+        self.label = label
+        self.astype = astype
+        self.cast = cast
+        self.memory = memory
+
+    def __getitem__(self, key):
+        return indexing.explicit_indexing_adapter(
+            key, self.shape, indexing.IndexingSupport.BASIC, self._getitem
+        )
+
+    def _getitem(self, key):
+        host = self.array[indexing.BasicIndexer(key)]
+        if isinstance(host, indexing.ExplicitlyIndexed):
+            host = host.get_duck_array()
+        return to_device(
+            host,
+            pinned=self.pinned,
+            label=self.label,
+            astype=self.astype,
+            cast=self.cast,
+            memory=self.memory,
+        )
+
+
+class GDSBackendArray(DeviceBackendArray):
+    """
+    Device backend array reading from a zarr store opened with GPUDirect Storage.
+
+    Reads run with zarr's GPU buffers enabled, so that a kvikio ``GDSStore``
+    places chunk bytes directly in device memory and no host copy is made.
+    """
+
+    __slots__ = ()
+
+    def _getitem(self, key):
+        import zarr
+
+        with zarr.config.enable_gpu():
+            return super()._getitem(key)
+
+
+def lazy_device_array(array, pinned=False, array_type=DeviceBackendArray, **kwargs):
+    """
+    Wrap host ``array`` so that it is moved to the GPU on indexing or load.
+
+    Extra keyword arguments are passed on to ``array_type``.
+    """
+    backend_array = array_type(array, pinned=pinned, **kwargs)
+    return indexing.MemoryCachedArray(indexing.LazilyIndexedArray(backend_array))
+
+
+def is_device_backed(array):
+    """
+    Whether a Variable's (possibly lazily indexed) data lives on the GPU.
+
+    Walks the chain of xarray's explicit indexing wrappers without loading
+    any data.
+    """
+    while isinstance(array, indexing.ExplicitlyIndexed):
+        if isinstance(array, DeviceBackendArray | DeviceCOOArray | SpillableArray):
+            return True
+        array = getattr(array, "array", None)
+    return is_cupy_array(array)
+
+
+class CupyBackendEntrypoint(BackendEntrypoint):
+    """
+    Open datasets with data variables that are read into GPU memory.
+
+    Wraps one of xarray's own engines: variables are opened lazily with it
+    and only copied to the GPU, region by region, once they are indexed or
+    loaded. Subclasses pick the wrapped engine through ``host_engine``.
+    """
+
+    host_engine = None
+    open_dataset_parameters = (
+        "filename_or_obj",
+        "drop_variables",
+        "mask_and_scale",
+        "decode_times",
+        "concat_characters",
+        "decode_coords",
+        "use_cftime",
+        "decode_timedelta",
+        "pinned",
+    )
+    url = "https://cupy-xarray.readthedocs.io"
+
+    def open_dataset(self, filename_or_obj, *, drop_variables=None, pinned=True, **kwargs):
+        ds = self._open_host_dataset(filename_or_obj, drop_variables=drop_variables, **kwargs)
+        return _device_dataset(ds, pinned=pinned)
+
+    def _open_host_dataset(self, filename_or_obj, **kwargs):
+        return xr.open_dataset(
+            filename_or_obj, engine=self.host_engine, chunks=None, cache=False, **kwargs
+        )
+
+
+def _device_dataset(ds, pinned=False, array_type=DeviceBackendArray):
+    """Wrap the data variables of a lazily opened host Dataset in device backend arrays."""
+    data = {
+        var: lazy_device_array(da.variable._data, pinned=pinned, array_type=array_type, label=var)
+        for var, da in ds.data_vars.items()
+    }
+    gds = ds.copy(data=data)
+    gds.set_close(ds.close)
+    return gds
+
+
+class CupyNetCDF4BackendEntrypoint(CupyBackendEntrypoint):
+    """
+    Open netCDF files with data variables in GPU memory (``engine="cupy_netcdf4"``).
+
+    Data is decoded on the host with netCDF4, staged through pinned memory
+    and moved to the GPU with a single copy per read.
+    """
+
+    host_engine = "netcdf4"
+    description = "Open netCDF (.nc, .nc4 and .cdf) files into GPU memory"
+
+
+class CupyZarrBackendEntrypoint(CupyBackendEntrypoint):
+    """
+    Open zarr stores with data variables in GPU memory (``engine="cupy_zarr"``).
+
+    When `kvikio <https://docs.rapids.ai/api/kvikio/stable/>`_ is installed
+    and the store is a local directory, chunks are read with GPUDirect
+    Storage straight into device buffers. Otherwise they are read on the host,
+    staged through pinned memory and moved to the GPU with a single copy per
+    read.
+    """
+
+    host_engine = "zarr"
+    description = "Open zarr stores into GPU memory, using kvikio if available"
+    open_dataset_parameters = CupyBackendEntrypoint.open_dataset_parameters + ("group",)
+
+    def open_dataset(self, filename_or_obj, *, drop_variables=None, pinned=True, **kwargs):
+        store = _gds_store(filename_or_obj)
+        if store is None:
+            return super().open_dataset(
+                filename_or_obj, drop_variables=drop_variables, pinned=pinned, **kwargs
+            )
+        ds = self._open_host_dataset(store, drop_variables=drop_variables, **kwargs)
+        return _device_dataset(ds, array_type=GDSBackendArray)
+
+
+def _gds_store(filename_or_obj):
+    """Open a local zarr directory as a kvikio GDSStore, if kvikio is available."""
+    try:
+        import kvikio.zarr
+    except ImportError:
+        return None
+    if not isinstance(filename_or_obj, str | os.PathLike) or not os.path.isdir(filename_or_obj):
+        return None
+    return kvikio.zarr.GDSStore(os.fspath(filename_or_obj))
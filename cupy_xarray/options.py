@@ -0,0 +1,98 @@
+from typing import Any
+
+OPTIONS: dict[str, Any] = {
+    "conversion_cache_size": 2**30,
+    "device_memory_budget": None,
+    "host_buffer_cache_size": 2**30,
+    "over_budget": "raise",
+    "pinned_staging": False,
+    "pinned_pool_size": 2**30,
+}
+
+_OVER_BUDGET_OPTIONS = frozenset(["raise", "chunk", "ignore"])
+
+
+def _positive_integer(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+
+def _non_negative_integer(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+_VALIDATORS = {
+    "conversion_cache_size": _positive_integer,
+    "device_memory_budget": lambda value: value is None or _positive_integer(value),
+    "host_buffer_cache_size": _positive_integer,
+    "over_budget": _OVER_BUDGET_OPTIONS.__contains__,
+    "pinned_staging": lambda value: isinstance(value, bool),
+    "pinned_pool_size": _non_negative_integer,
+}
+
+
+class set_options:
+    """
+    Set options for cupy-xarray in a controlled context.
+
+    Parameters
+    ----------
+    conversion_cache_size : int, default: 2**30
+        Maximum number of bytes of device memory held by copies cached by
+        ``as_cupy(cache=True)``.
+    device_memory_budget : int, optional
+        Number of bytes of device memory ``as_cupy`` may fill. Defaults to the
+        memory currently free on the device, including blocks cached by
+        cupy's memory pool.
+    host_buffer_cache_size : int, default: 2**30
+        Maximum number of bytes of pinned output buffers kept for reuse by
+        ``get(reuse=True)`` and ``as_numpy(reuse=True)``.
+    over_budget : {"raise", "chunk", "ignore"}, default: "raise"
+        What ``as_cupy`` does when the estimated device footprint of an
+        object exceeds the budget: raise a ``MemoryError`` before copying
+        anything, rechunk it with dask into chunks that fit, or copy anyway.
+    pinned_staging : bool, default: False
+        Stage host-to-device copies made by ``as_cupy`` through page-locked
+        (pinned) host memory. Can be overridden per call with ``pinned=``.
+    pinned_pool_size : int, default: 2**30
+        Maximum number of bytes of idle pinned buffers kept around for reuse.
+        Least recently used buffers are freed first once the limit is exceeded.
+        0 frees buffers as soon as they are released.
+
+    Examples
+    --------
+    It is possible to use ``set_options`` either as a context manager:
+
+    >>> import cupy_xarray
+    >>> with cupy_xarray.set_options(pinned_staging=True):
+    ...     gda = da.cupy.as_cupy()  # doctest: +SKIP
+
+    Or to set global options:
+
+    >>> cupy_xarray.set_options(pinned_pool_size=2**28)  # doctest: +ELLIPSIS
+    <cupy_xarray.options.set_options object at 0x...>
+    """
+
+    def __init__(self, **kwargs):
+        self.old = {}
+        for k, v in kwargs.items():
+            if k not in OPTIONS:
+                raise ValueError(
+                    f"argument name {k!r} is not in the set of valid options {set(OPTIONS)!r}"
+                )
+            if k in _VALIDATORS and not _VALIDATORS[k](v):
+                if k == "over_budget":
+                    expected = f"Expected one of {sorted(_OVER_BUDGET_OPTIONS)!r}"
+                else:
+                    expected = ""
+                raise ValueError(f"option {k!r} given an invalid value: {v!r}. " + expected)
+            self.old[k] = OPTIONS[k]
+        self._apply_update(kwargs)
+
+    def _apply_update(self, options_dict):
+        OPTIONS.update(options_dict)
+
+    def __enter__(self):
+        return
+
+    def __exit__(self, type, value, traceback):
+        self._apply_update(self.old)
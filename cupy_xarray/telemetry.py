@@ -0,0 +1,213 @@
+"""
+Instrumentation of the host/device transfers started by cupy-xarray.
+
+Every copy made by the accessors, including the per-chunk copies run inside
+dask tasks and the reads of the ``cupy_*`` backends, is reported as a
+:class:`Transfer` to the registered hooks. With no hooks registered the
+instrumentation costs a single check per transfer.
+
+Only transfers made in the current process are seen, so with
+``dask.distributed`` hooks have to be registered on the workers.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, NamedTuple
+
+from ._compat import cp
+
+HOST_TO_DEVICE = "host_to_device"
+DEVICE_TO_HOST = "device_to_host"
+
+
+class Transfer(NamedTuple):
+    """A single host/device copy."""
+
+    #: ``"host_to_device"`` or ``"device_to_host"``
+    direction: str
+    #: name of the variable the data belongs to, if known
+    name: Any
+    nbytes: int
+    dtype: Any
+    shape: tuple
+    #: seconds spent in the call on the host
+    wall_time: float
+    #: seconds spent on the device, or None if not measured
+    device_time: float | None
+
+
+# hook -> whether it asked for device timings; replaced, never mutated, so
+# that transfers can iterate over it without taking the lock
+_hooks: dict = {}
+_hooks_lock = threading.Lock()
+
+
+def register_hook(hook, device_time=False):
+    """
+    Call ``hook(transfer)`` with a :class:`Transfer` after every transfer.
+
+    Parameters
+    ----------
+    hook : callable
+        Called from the thread that made the transfer, possibly several
+        threads at once when dask computes chunks in parallel.
+    device_time : bool, default: False
+        Also measure the time spent on the device with CUDA events. This
+        synchronizes the stream after every transfer, which serializes
+        copies that would otherwise overlap.
+
+    Returns
+    -------
+    hook: callable
+        ``hook`` itself, so that this can be used as a decorator.
+    """
+    global _hooks
+    with _hooks_lock:
+        _hooks = {**_hooks, hook: device_time}
+    return hook
+
+
+def unregister_hook(hook):
+    """Stop calling a hook added with :func:`register_hook`."""
+    global _hooks
+    with _hooks_lock:
+        _hooks = {key: value for key, value in _hooks.items() if key is not hook}
+
+
+@contextmanager
+def transfer(direction, array, name=None):
+    """
+    Report the transfer of ``array`` made inside this context to the hooks.
+
+    ``array`` is the source of the copy; only its size, dtype and shape
+    are recorded.
+    """
+    hooks = _hooks
+    if not hooks:
+        yield
+        return
+    timed = any(hooks.values())
+    device_time = None
+    if timed:
+        start, end = cp.cuda.Event(), cp.cuda.Event()
+        start.record()
+    begin = time.perf_counter()
+    yield
+    if timed:
+        end.record()
+        end.synchronize()
+        device_time = cp.cuda.get_elapsed_time(start, end) / 1000
+    record = Transfer(
+        direction,
+        name,
+        array.nbytes,
+        array.dtype,
+        array.shape,
+        time.perf_counter() - begin,
+        device_time,
+    )
+    for hook in hooks:
+        hook(record)
+
+
+class TransferCounters:
+    """
+    Hook aggregating transfers by variable name and direction.
+
+    Cheap enough to stay registered in production; see :meth:`top` to find
+    the variables that dominate traffic between host and device.
+
+    Examples
+    --------
+    >>> counters = register_hook(TransferCounters())
+    >>> gds = ds.cupy.as_cupy()  # doctest: +SKIP
+    >>> counters.top(3)  # doctest: +SKIP
+    """
+
+    _FIELDS = ("count", "nbytes", "wall_time", "device_time")
+
+    def __init__(self):
+        self._totals = defaultdict(lambda: dict.fromkeys(self._FIELDS, 0))
+        self._lock = threading.Lock()
+
+    def __call__(self, transfer):
+        with self._lock:
+            totals = self._totals[transfer.name, transfer.direction]
+            totals["count"] += 1
+            totals["nbytes"] += transfer.nbytes
+            totals["wall_time"] += transfer.wall_time
+            totals["device_time"] += transfer.device_time or 0
+
+    @property
+    def totals(self):
+        """
+        Aggregated counters.
+
+        Returns
+        -------
+        totals: dict
+            Maps ``(name, direction)`` to a dict with the ``count``, total
+            ``nbytes``, ``wall_time`` and ``device_time`` of its transfers.
+        """
+        with self._lock:
+            return {key: dict(value) for key, value in self._totals.items()}
+
+    def top(self, n=None, by="nbytes"):
+        """Return the ``n`` entries of :attr:`totals` with the largest ``by``."""
+        ranked = sorted(self.totals.items(), key=lambda item: item[1][by], reverse=True)
+        return ranked if n is None else ranked[:n]
+
+    def reset(self):
+        """Set all counters back to zero."""
+        with self._lock:
+            self._totals.clear()
+
+
+class TransferLog(TransferCounters):
+    """Hook keeping every :class:`Transfer` on top of the aggregated counters."""
+
+    def __init__(self):
+        super().__init__()
+        self.transfers = []
+
+    def __call__(self, transfer):
+        super().__call__(transfer)
+        with self._lock:
+            self.transfers.append(transfer)
+
+    def reset(self):
+        super().reset()
+        with self._lock:
+            self.transfers.clear()
+
+
+@contextmanager
+def record(device_time=False):
+    """
+    Record the transfers made within a context.
+
+    Parameters
+    ----------
+    device_time : bool, default: False
+        Also measure device time, see :func:`register_hook`.
+
+    Yields
+    ------
+    log: TransferLog
+        Log filled in as transfers happen.
+
+    Examples
+    --------
+    >>> from cupy_xarray import telemetry
+    >>> with telemetry.record() as log:
+    ...     gda = da.cupy.as_cupy().compute()  # doctest: +SKIP
+    >>> log.totals  # doctest: +SKIP
+    """
+    log = TransferLog()
+    register_hook(log, device_time=device_time)
+    try:
+        yield log
+    finally:
+        unregister_hook(log)
@@ -1,8 +1,13 @@
+import asyncio
+
+import cupy as cp
 import numpy as np
 import pytest
 import xarray as xr
 
-import cupy_xarray  # noqa: F401
+import cupy_xarray
+from cupy_xarray._transfer import pinned_pool
+from cupy_xarray.accessors import _dataset_placements
 
 try:
     import dask.array
@@ -70,3 +75,400 @@ def test_data_array_accessor_dask(tutorial_da_air_dask):
 
     da = da.cupy.as_numpy()
     assert not da.cupy.is_cupy
+
+
+def test_data_array_accessor_pinned(tutorial_da_air):
+    with cupy_xarray.set_options(pinned_staging=True):
+        da = tutorial_da_air.cupy.as_cupy()
+    assert da.cupy.is_cupy
+    np.testing.assert_array_equal(da.cupy.get(), tutorial_da_air.values)
+
+    da = tutorial_da_air.cupy.as_cupy(pinned=True)
+    np.testing.assert_array_equal(da.cupy.get(), tutorial_da_air.values)
+
+
+def test_data_set_accessor_pinned(tutorial_ds_air):
+    pool = pinned_pool()
+    pool.clear()
+    with cupy_xarray.set_options(pinned_staging=True):
+        ds = tutorial_ds_air.cupy.as_cupy()
+    assert ds.cupy.is_cupy
+    # the staging buffer went back to the pool
+    assert pool.cached_bytes >= tutorial_ds_air.air.nbytes
+    np.testing.assert_array_equal(ds.air.cupy.get(), tutorial_ds_air.air.values)
+
+
+def test_data_set_accessor_streams(tutorial_ds_air):
+    ds = tutorial_ds_air.assign(
+        air_c=tutorial_ds_air.air - 273.15,
+        lat_weights=np.cos(np.deg2rad(tutorial_ds_air.lat)),
+    )
+    gds = ds.cupy.as_cupy(streams=2)
+    assert gds.cupy.is_cupy
+    assert list(gds.data_vars) == list(ds.data_vars)
+    for var in ds.data_vars:
+        np.testing.assert_array_equal(gds[var].cupy.get(), ds[var].values)
+
+
+def test_data_set_accessor_packed(tutorial_ds_air):
+    ds = tutorial_ds_air.assign(
+        lat_weights=np.cos(np.deg2rad(tutorial_ds_air.lat)),
+        offset=xr.DataArray(273.15),
+    )
+    gds = ds.cupy.as_cupy(pack_threshold=1024)
+    assert gds.cupy.is_cupy
+    assert list(gds.data_vars) == list(ds.data_vars)
+    for var in ds.data_vars:
+        np.testing.assert_array_equal(gds[var].cupy.get(), ds[var].values)
+
+    hds = gds.cupy.as_numpy(pack_threshold=1024)
+    assert not hds.cupy.is_cupy
+    xr.testing.assert_identical(hds, ds)
+
+
+def test_data_array_accessor_to_dlpack(tutorial_da_air):
+    da = tutorial_da_air.as_cupy()
+    garr = cp.from_dlpack(da.cupy.to_dlpack())
+    assert garr.data.ptr == da.data.data.ptr
+
+    with pytest.raises(TypeError, match="as_cupy"):
+        tutorial_da_air.cupy.to_dlpack()
+
+
+def test_data_array_accessor_to_torch(tutorial_da_air):
+    torch = pytest.importorskip("torch")
+    da = tutorial_da_air.as_cupy()
+    tensor = da.cupy.to_torch()
+    assert isinstance(tensor, torch.Tensor)
+    assert tensor.data_ptr() == da.data.data.ptr
+
+
+def test_data_array_accessor_lazy():
+    da = xr.tutorial.open_dataset("air_temperature").air
+    gda = da.cupy.as_cupy(lazy=True)
+    assert gda.cupy.is_cupy
+
+    sub = gda.isel(time=0)
+    assert isinstance(sub.data, cp.ndarray)
+    np.testing.assert_array_equal(sub.data.get(), da.isel(time=0).values)
+
+    gda.load()
+    assert isinstance(gda.data, cp.ndarray)
+    assert gda.cupy.is_cupy
+
+
+def test_data_array_accessor_over_budget(tutorial_da_air):
+    with cupy_xarray.set_options(device_memory_budget=tutorial_da_air.nbytes // 2):
+        with pytest.raises(MemoryError, match="over_budget"):
+            tutorial_da_air.cupy.as_cupy()
+
+        da = tutorial_da_air.cupy.as_cupy(over_budget="chunk")
+    assert isinstance(da.data, dask_array_type)
+    assert da.cupy.is_cupy
+    np.testing.assert_array_equal(da.cupy.as_numpy().values, tutorial_da_air.values)
+
+
+def test_data_array_accessor_over_budget_dtype(tutorial_da_air):
+    da = tutorial_da_air.astype("float64")
+    with cupy_xarray.set_options(device_memory_budget=int(tutorial_da_air.nbytes * 1.5)):
+        with pytest.raises(MemoryError, match="over_budget"):
+            da.cupy.as_cupy()
+
+        gda = da.cupy.as_cupy(dtype="float32")
+    assert isinstance(gda.data, cp.ndarray)
+    assert gda.dtype == np.float32
+
+
+def test_data_set_accessor_over_budget(tutorial_ds_air):
+    ds = tutorial_ds_air.assign(air_c=tutorial_ds_air.air - 273.15)
+    with cupy_xarray.set_options(
+        device_memory_budget=int(tutorial_ds_air.air.nbytes * 1.5), over_budget="chunk"
+    ):
+        gds = ds.cupy.as_cupy()
+    assert all(isinstance(da.data, dask_array_type) for da in gds.data_vars.values())
+    assert gds.cupy.is_cupy
+
+
+@pytest.mark.parametrize("placement", ["round-robin", "time", lambda location: 0])
+def test_data_array_accessor_placement(tutorial_da_air_dask, placement):
+    da = tutorial_da_air_dask.cupy.as_cupy(placement=placement, devices=[0])
+    assert da.cupy.is_cupy
+    assert da.cupy.placement == {"placement": placement, "devices": (0,)}
+    np.testing.assert_array_equal(da.cupy.as_numpy().values, tutorial_da_air_dask.values)
+
+    with pytest.raises(ValueError, match="dimension name"):
+        tutorial_da_air_dask.cupy.as_cupy(placement="level")
+
+
+def test_data_set_accessor_placement(tutorial_ds_air_dask):
+    lat = tutorial_ds_air_dask.lat.values
+    ds = tutorial_ds_air_dask.assign(
+        lat_bnds=(("lat", "nv"), np.stack([lat, lat + 2.5], axis=1)),
+        mask=tutorial_ds_air_dask.air.isel(time=0) > 273,
+    )
+    gds = ds.cupy.as_cupy(placement="time", devices=[0])
+    assert gds.cupy.is_cupy
+    assert gds.air.cupy.placement == {"placement": "time", "devices": (0,)}
+    assert gds.lat_bnds.cupy.placement == {"placement": "round-robin", "devices": (0,)}
+    xr.testing.assert_identical(gds.cupy.as_numpy().compute(), ds.compute())
+
+    with pytest.raises(ValueError, match="dimension name"):
+        ds.cupy.as_cupy(placement="level")
+
+
+def test_data_set_placements(tutorial_ds_air):
+    ds = tutorial_ds_air.assign(
+        air_c=tutorial_ds_air.air - 273.15,
+        mask=tutorial_ds_air.air.isel(time=0) > 273,
+        air_dask=tutorial_ds_air.air.chunk(time=100),
+    )
+    # fake device ids, nothing is copied
+    devices = (0, 1, 2)
+    placements = _dataset_placements(ds, "round-robin", devices)
+    assert placements == {
+        "air": ("round-robin", (0,)),
+        "air_c": ("round-robin", (1,)),
+        "mask": ("round-robin", (2,)),
+        "air_dask": ("round-robin", devices),
+    }
+    placements = _dataset_placements(ds, "time", devices)
+    assert placements["mask"] == ("round-robin", (2,))
+    assert placements["air_dask"] == ("time", devices)
+
+
+def test_data_array_accessor_out(tutorial_da_air):
+    da = tutorial_da_air.as_cupy()
+    out = np.empty(da.shape, dtype=da.dtype)
+    assert da.cupy.get(out=out) is out
+    np.testing.assert_array_equal(out, tutorial_da_air.values)
+
+    hda = da.cupy.as_numpy(reuse=True)
+    assert da.cupy.as_numpy(reuse=True).data is hda.data
+    xr.testing.assert_identical(hda, tutorial_da_air)
+
+
+def test_data_array_accessor_dask_deterministic(tutorial_da_air_dask):
+    gda = tutorial_da_air_dask.as_cupy()
+    assert gda.data.name == tutorial_da_air_dask.as_cupy().data.name
+    assert isinstance(gda.data._meta, cp.ndarray)
+
+    da = gda.cupy.as_numpy()
+    assert da.data.name == gda.cupy.as_numpy().data.name
+    assert isinstance(da.data._meta, np.ndarray)
+
+
+def test_data_array_accessor_dask_round_trip(tutorial_da_air_dask):
+    gda = tutorial_da_air_dask.as_cupy()
+    round_trip = gda.cupy.as_numpy().cupy.as_cupy()
+    assert round_trip.data.name == gda.data.name
+    assert len(round_trip.data.dask.layers) == len(gda.data.dask.layers)
+
+    da = gda.cupy.as_numpy()
+    assert da.cupy.as_cupy().cupy.as_numpy().data.name == da.data.name
+    assert gda.cupy.as_numpy().data.name == da.data.name
+    np.testing.assert_array_equal(round_trip.cupy.as_numpy().values, tutorial_da_air_dask.values)
+
+
+@pytest.mark.parametrize("cast", [None, "host", "device"])
+@pytest.mark.parametrize("pinned", [False, True])
+def test_data_array_accessor_dtype(tutorial_da_air, cast, pinned):
+    da = tutorial_da_air.astype("float64")
+    gda = da.cupy.as_cupy(dtype="float32", cast=cast, pinned=pinned)
+    assert gda.data.dtype == np.float32
+    np.testing.assert_allclose(gda.cupy.get(), da.values, rtol=1e-6)
+
+    hda = gda.cupy.as_numpy(dtype="float64")
+    assert hda.dtype == np.float64
+    with pytest.raises(ValueError, match="cast must be one of"):
+        da.cupy.as_cupy(dtype="float32", cast="wire")
+
+
+def test_data_array_accessor_dtype_dask(tutorial_da_air_dask):
+    gda = tutorial_da_air_dask.cupy.as_cupy(dtype="float16")
+    assert gda.dtype == np.float16
+    assert isinstance(gda.data._meta, cp.ndarray)
+    hda = gda.cupy.as_numpy(dtype="float32")
+    assert hda.dtype == np.float32
+    assert hda.compute().dtype == np.float32
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"streams": 2}, {"pack_threshold": 2**30}])
+def test_data_set_accessor_dtype(tutorial_ds_air, kwargs):
+    ds = tutorial_ds_air.assign(other=tutorial_ds_air.air.astype("float64"))
+    gds = ds.cupy.as_cupy(dtype={"other": "float16"}, **kwargs)
+    assert gds.other.dtype == np.float16
+    assert gds.air.dtype == ds.air.dtype
+    assert gds.cupy.as_numpy(dtype="float64").air.dtype == np.float64
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"streams": 2}, {"pack_threshold": 2**30}])
+def test_data_set_accessor_keeps_encoding_and_indexes(tutorial_ds_air, kwargs):
+    ds = tutorial_ds_air
+    ds.air.encoding["scale_factor"] = 0.01
+    gds = ds.cupy.as_cupy(**kwargs)
+    assert gds.air.encoding["scale_factor"] == 0.01
+    assert gds.xindexes["time"] is ds.xindexes["time"]
+
+    hds = gds.cupy.as_numpy()
+    assert hds.air.encoding["scale_factor"] == 0.01
+    assert hds.xindexes["time"] is ds.xindexes["time"]
+    xr.testing.assert_identical(hds, ds)
+
+
+def test_data_array_accessor_persist(tutorial_da_air_dask):
+    da = tutorial_da_air_dask
+    assert da.cupy.device_nbytes == 0
+    gda = da.as_cupy()
+    assert gda.cupy.device_nbytes == 0
+    # the task graph is not built to find persisted chunks
+    assert not all(layer.is_materialized() for layer in gda.data.dask.layers.values())
+
+    persisted = da.cupy.persist()
+    assert persisted.cupy.is_cupy
+    assert isinstance(persisted.data, dask_array_type)
+    assert persisted.cupy.device_nbytes == da.nbytes
+    np.testing.assert_array_equal(persisted.cupy.as_numpy().values, da.values)
+
+
+def test_data_set_accessor_persist(tutorial_ds_air_dask):
+    ds = tutorial_ds_air_dask.cupy.persist()
+    assert ds.cupy.is_cupy
+    assert ds.cupy.device_nbytes == ds.air.nbytes
+    assert ds.cupy.as_numpy().compute().cupy.device_nbytes == 0
+
+
+def test_data_array_accessor_managed_memory(tutorial_da_air, tutorial_da_air_dask):
+    gda = tutorial_da_air.cupy.as_cupy(memory="managed")
+    attributes = cp.cuda.runtime.pointerGetAttributes(gda.data.data.ptr)
+    assert attributes.type == cp.cuda.runtime.memoryTypeManaged
+    assert gda.cupy.advise("read_mostly").cupy.prefetch() is gda
+    gda.cupy.prefetch(device="host")
+    np.testing.assert_array_equal(gda.cupy.get(), tutorial_da_air.values)
+
+    persisted = tutorial_da_air_dask.cupy.as_cupy(memory="managed").persist()
+    block = next(iter(dict(persisted.data.dask).values()))
+    attributes = cp.cuda.runtime.pointerGetAttributes(block.data.ptr)
+    assert attributes.type == cp.cuda.runtime.memoryTypeManaged
+
+    with pytest.raises(TypeError, match="managed memory"):
+        tutorial_da_air.cupy.as_cupy().cupy.prefetch()
+    with pytest.raises(ValueError, match="memory must be one of"):
+        tutorial_da_air.cupy.as_cupy(memory="pinned")
+
+
+@pytest.mark.parametrize("prefetch", [1, 3])
+def test_data_array_accessor_iter_chunks(tutorial_da_air_dask, prefetch):
+    da = tutorial_da_air_dask
+    chunks = list(da.cupy.iter_chunks(prefetch=prefetch, dtype="float64"))
+    assert len(chunks) == da.data.npartitions
+    for region, chunk in chunks:
+        assert isinstance(chunk.data, cp.ndarray)
+        assert chunk.dtype == np.float64
+        np.testing.assert_array_equal(chunk.data.get(), da.isel(region).values)
+        assert chunk.lat.equals(da.lat.isel(lat=region["lat"]))
+
+
+@pytest.mark.parametrize("shuffle", [False, True])
+def test_data_set_accessor_iter_batches(tutorial_ds_air_dask, shuffle):
+    ds = tutorial_ds_air_dask.assign(mask=tutorial_ds_air_dask.air.isel(time=0) > 273)
+    batches = list(ds.cupy.iter_batches("time", 500, shuffle=shuffle, seed=0, prefetch=3))
+    assert len(batches) == -(-ds.sizes["time"] // 500)
+    times = np.concatenate([batch.time.values for batch in batches])
+    assert sorted(times) == list(ds.time.values)
+    for batch in batches:
+        assert batch.cupy.is_cupy
+        assert batch.mask.data is batches[0].mask.data
+        np.testing.assert_array_equal(batch.air.data.get(), ds.air.sel(time=batch.time).values)
+
+    batches = list(ds.air.cupy.iter_batches("time", 500, drop_last=True, reuse=True))
+    assert len(batches) == ds.sizes["time"] // 500
+    assert batches[0].data is batches[2].data
+
+
+@pytest.mark.parametrize("func", ["sum", "count", "mean", "var", "std", "min", "max"])
+@pytest.mark.parametrize("dim", [None, "time", ["lat", "lon"]])
+def test_data_array_accessor_reduce(tutorial_da_air, func, dim):
+    da = tutorial_da_air.where(tutorial_da_air > 250)
+    reduced = da.cupy.reduce(func, dim=dim, slab_size=100)
+    assert isinstance(reduced.data, cp.ndarray)
+    expected = getattr(da, func)(dim=dim)
+    xr.testing.assert_allclose(reduced.cupy.as_numpy(), expected, rtol=1e-4)
+
+
+def test_data_array_accessor_reduce_ddof(tutorial_da_air):
+    da = tutorial_da_air
+    reduced = da.cupy.reduce("std", dim="time", ddof=1, slab_dim="lat", slab_size=7)
+    expected = da.std("time", ddof=1)
+    xr.testing.assert_allclose(reduced.cupy.as_numpy(), expected, rtol=1e-5)
+
+
+def test_data_array_accessor_reduce_histogram(tutorial_da_air_dask):
+    da = tutorial_da_air_dask
+    values = da.values.ravel()
+    counts, edges = np.histogram(values, bins=20)
+    hist = da.cupy.reduce("histogram", bins=20, slab_size=500)
+    np.testing.assert_array_equal(hist.data.get(), counts)
+    np.testing.assert_array_equal(hist.bin_lower.values, edges[:-1])
+    np.testing.assert_array_equal(hist.bin_upper.values, edges[1:])
+
+    counts, _ = np.histogram(values, bins=50, range=(250, 290))
+    hist = da.cupy.reduce("histogram", bins=50, range=(250, 290))
+    np.testing.assert_array_equal(hist.data.get(), counts)
+
+    counts, _ = np.histogram(values, bins=[240, 260, 280, 300])
+    hist = da.cupy.reduce("histogram", bins=[240, 260, 280, 300])
+    np.testing.assert_array_equal(hist.data.get(), counts)
+
+    with pytest.raises(ValueError, match="all dimensions"):
+        da.cupy.reduce("histogram", dim="time")
+
+
+def test_data_set_accessor_reduce(tutorial_ds_air):
+    ds = tutorial_ds_air.assign(mask=tutorial_ds_air.air.isel(time=0) > 273)
+    reduced = ds.cupy.reduce("mean", dim="time", dtype={"air": "float64"})
+    assert reduced.attrs == ds.attrs
+    assert list(reduced.data_vars) == ["air", "mask"]
+    assert reduced.air.dtype == np.float64
+    assert reduced.mask.equals(ds.mask)
+    expected = ds.air.astype("float64").mean("time")
+    xr.testing.assert_allclose(reduced.air.cupy.as_numpy(), expected)
+
+    with pytest.raises(ValueError, match="func must be one of"):
+        ds.cupy.reduce("median")
+    with pytest.raises(ValueError, match="need a range"):
+        ds.cupy.reduce("histogram")
+
+
+def test_data_array_accessor_as_numpy_nonblocking(tutorial_da_air, tutorial_da_air_dask):
+    gda = tutorial_da_air.cupy.as_cupy()
+    future = (gda * 2).cupy.as_numpy(blocking=False, dtype="float64")
+    da = future.result()
+    assert isinstance(da.data, np.ndarray)
+    assert da.dtype == np.float64
+    xr.testing.assert_identical(da, (tutorial_da_air * 2).astype("float64"))
+
+    da = asyncio.run(gda.cupy.as_numpy_async())
+    xr.testing.assert_identical(da, tutorial_da_air)
+    out = np.empty(gda.shape, dtype=gda.dtype)
+    assert gda.cupy.get(out=out, blocking=False).result() is out
+    future = tutorial_da_air.cupy.get(blocking=False)
+    assert future.done()
+    assert future.result() is tutorial_da_air.values
+
+    future = tutorial_da_air_dask.cupy.as_cupy().cupy.as_numpy(blocking=False)
+    assert future.done()
+    xr.testing.assert_identical(future.result().compute(), tutorial_da_air_dask.compute())
+
+
+def test_data_set_accessor_iter_batches_without_coordinate(tutorial_ds_air):
+    ds = tutorial_ds_air.drop_vars("time")
+    batches = list(ds.cupy.iter_batches("time", 1000))
+    assert [batch.sizes["time"] for batch in batches] == [1000, 1000, 920]
+    np.testing.assert_array_equal(batches[1].air.data.get(), ds.air[1000:2000].values)
+    batches[0].attrs["title"] = "batch"
+    assert ds.attrs["title"] != "batch"
+
+    with cupy_xarray.telemetry.record() as log:
+        batch = next(ds.air.cupy.iter_batches("time", 1000, shuffle=True, seed=0))
+    assert batch.name == "air"
+    assert {transfer.name for transfer in log.transfers} == {"air"}
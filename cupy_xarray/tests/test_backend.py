@@ -0,0 +1,65 @@
+import cupy as cp
+import numpy as np
+import pytest
+import xarray as xr
+from xarray.core import indexing
+
+from cupy_xarray.backend import (
+    CupyNetCDF4BackendEntrypoint,
+    CupyZarrBackendEntrypoint,
+    DeviceBackendArray,
+    is_device_backed,
+    lazy_device_array,
+)
+
+
+def test_device_backend_array_indexing():
+    arr = np.arange(24, dtype="float32").reshape(2, 3, 4)
+    backend_array = DeviceBackendArray(arr)
+    assert backend_array.shape == arr.shape
+    assert backend_array.dtype == arr.dtype
+
+    result = backend_array[indexing.BasicIndexer((1, slice(None), slice(1, 3)))]
+    assert isinstance(result, cp.ndarray)
+    np.testing.assert_array_equal(result.get(), arr[1, :, 1:3])
+
+    result = backend_array[indexing.OuterIndexer((0, np.array([0, 2]), slice(None)))]
+    np.testing.assert_array_equal(result.get(), arr[0, [0, 2], :])
+
+
+def test_is_device_backed():
+    arr = np.arange(6).reshape(2, 3)
+    lazy = lazy_device_array(arr)
+    assert is_device_backed(lazy)
+    assert not is_device_backed(indexing.LazilyIndexedArray(arr))
+    assert is_device_backed(cp.asarray(arr))
+
+
+@pytest.fixture
+def air_dataset():
+    return xr.tutorial.load_dataset("air_temperature").isel(time=slice(10))
+
+
+def test_open_dataset_netcdf4(air_dataset, tmp_path):
+    pytest.importorskip("netCDF4")
+    path = tmp_path / "air.nc"
+    air_dataset.to_netcdf(path, engine="netcdf4")
+
+    with xr.open_dataset(path, engine=CupyNetCDF4BackendEntrypoint) as ds:
+        assert ds.cupy.is_cupy
+        air = ds.air.isel(time=0).data
+        assert isinstance(air, cp.ndarray)
+        np.testing.assert_array_equal(air.get(), air_dataset.air.isel(time=0).values)
+        assert not ds.cupy.as_numpy().cupy.is_cupy
+
+
+def test_open_dataset_zarr(air_dataset, tmp_path):
+    pytest.importorskip("zarr")
+    path = tmp_path / "air.zarr"
+    air_dataset.to_zarr(path)
+
+    with xr.open_dataset(path, engine=CupyZarrBackendEntrypoint) as ds:
+        assert ds.cupy.is_cupy
+        ds = ds.load()
+        assert isinstance(ds.air.data, cp.ndarray)
+        np.testing.assert_array_equal(ds.air.data.get(), air_dataset.air.values)
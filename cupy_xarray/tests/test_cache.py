@@ -0,0 +1,62 @@
+import gc
+
+import cupy as cp
+import numpy as np
+import pytest
+import xarray as xr
+
+import cupy_xarray
+from cupy_xarray._cache import DeviceArrayCache, conversion_cache
+
+
+def test_device_array_cache():
+    cache = DeviceArrayCache(max_bytes=2 * 800)
+    host = np.arange(100, dtype="float64")
+    assert cache.get(host) is None
+
+    device = cp.asarray(host)
+    cache.put(host, device)
+    assert not host.flags.writeable
+    device32 = device.astype("float32")
+    cache.put(host, device32, dtype="float32")
+    assert cache.get(host) is device
+    assert cache.get(host[:]) is device
+    assert cache.get(host[::2]) is None
+    assert cache.get(host, dtype="float32") is device32
+
+    del host
+    gc.collect()
+    assert len(cache) == 0
+
+
+def test_device_array_cache_evicts_lru():
+    cache = DeviceArrayCache(max_bytes=2 * 800)
+    hosts = [np.full(100, i, dtype="float64") for i in range(3)]
+    for host in hosts:
+        cache.put(host, cp.asarray(host))
+    assert cache.get(hosts[0]) is None
+    assert cache.cached_bytes == 2 * 800
+
+    cache.clear()
+    assert len(cache) == 0
+    assert all(host.flags.writeable for host in hosts)
+
+
+def test_data_array_accessor_cache():
+    da = xr.DataArray(np.arange(12.0).reshape(3, 4), dims=("y", "x"), name="v")
+    gda = da.cupy.as_cupy(cache=True)
+    assert da.cupy.as_cupy(cache=True).data is gda.data
+    assert da.cupy.as_cupy().data is not gda.data
+    assert da.cupy.as_cupy(cache=True, dtype="float32").data is not gda.data
+
+    # the host array cannot change under the cached copy
+    with pytest.raises(ValueError, match="read-only"):
+        da.values[0, 0] = -1.0
+
+    cupy_xarray.clear_conversion_cache()
+    da.values[0, 0] = -1.0
+    gda = da.cupy.as_cupy(cache=True)
+    assert float(gda[0, 0]) == -1.0
+    cupy_xarray.clear_conversion_cache()
+    assert len(conversion_cache()) == 0
+    assert da.values.flags.writeable
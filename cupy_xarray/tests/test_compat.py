@@ -0,0 +1,36 @@
+import subprocess
+import sys
+
+import pytest
+
+from cupy_xarray._compat import LazyModule, is_cupy_array, is_dask_array
+
+
+def test_import_is_lazy():
+    code = (
+        "import sys, cupy_xarray; "
+        "print(sorted(m for m in ('cupy', 'cupyx', 'dask') if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_lazy_module():
+    lazy = LazyModule("json")
+    assert "json" in repr(lazy)
+    assert lazy.dumps([1]) == "[1]"
+
+    missing = LazyModule("not_a_module_name", "please install it")
+    with pytest.raises(ImportError, match="please install it"):
+        missing.dumps([1])
+
+
+def test_array_checks():
+    import cupy as cp
+    import numpy as np
+
+    assert is_cupy_array(cp.zeros(1))
+    assert not is_cupy_array(np.zeros(1))
+    assert not is_dask_array(np.zeros(1))
@@ -0,0 +1,24 @@
+import pytest
+
+import cupy_xarray
+from cupy_xarray.options import OPTIONS
+
+
+def test_set_options():
+    with cupy_xarray.set_options(over_budget="chunk", pinned_pool_size=0):
+        assert OPTIONS["over_budget"] == "chunk"
+        assert OPTIONS["pinned_pool_size"] == 0
+    assert OPTIONS["over_budget"] == "raise"
+
+
+def test_set_options_invalid():
+    with pytest.raises(ValueError, match="not in the set of valid options"):
+        cupy_xarray.set_options(not_an_option=True)
+    with pytest.raises(ValueError, match="Expected one of"):
+        cupy_xarray.set_options(over_budget="spill")
+    with pytest.raises(ValueError, match="invalid value"):
+        cupy_xarray.set_options(device_memory_budget=-1)
+    with pytest.raises(ValueError, match="invalid value"):
+        cupy_xarray.set_options(device_memory_budget=0)
+    with pytest.raises(ValueError, match="invalid value"):
+        cupy_xarray.set_options(pinned_pool_size=True)
@@ -0,0 +1,70 @@
+import time
+
+import cupy as cp
+import numpy as np
+import pytest
+
+from cupy_xarray._prefetch import prefetch_to_device
+
+
+def _loads(n, loaded, size=4):
+    for i in range(n):
+
+        def load(i=i):
+            loaded.append(i)
+            return np.full(size, i, dtype="float32")
+
+        yield i, load
+
+
+def test_prefetch_to_device():
+    loaded = []
+    results = list(prefetch_to_device(_loads(5, loaded), depth=2, astype="float64"))
+    assert [key for key, _ in results] == list(range(5))
+    for key, array in results:
+        assert isinstance(array, cp.ndarray)
+        assert array.dtype == np.float64
+        np.testing.assert_array_equal(array.get(), np.full(4, key))
+
+
+def test_prefetch_to_device_is_bounded():
+    loaded = []
+    arrays = prefetch_to_device(_loads(10, loaded), depth=3)
+    next(arrays)
+    time.sleep(0.5)
+    assert loaded == [0, 1, 2]
+    arrays.close()
+    assert loaded == [0, 1, 2]
+
+
+def test_prefetch_to_device_raises():
+    def loads():
+        yield 0, lambda: np.zeros(4)
+        yield 1, lambda: 1 / 0
+
+    arrays = prefetch_to_device(loads())
+    next(arrays)
+    with pytest.raises(ZeroDivisionError):
+        next(arrays)
+    with pytest.raises(ValueError, match="depth"):
+        next(prefetch_to_device(loads(), depth=0))
+
+
+def test_prefetch_to_device_reuse():
+    loaded = []
+    arrays = [array for _, array in prefetch_to_device(_loads(5, loaded), depth=2, reuse=True)]
+    assert arrays[0] is arrays[2] is arrays[4]
+    assert arrays[1] is arrays[3]
+    np.testing.assert_array_equal(arrays[4].get(), np.full(4, 4))
+
+
+@pytest.mark.parametrize("reuse", [False, True])
+def test_prefetch_to_device_dropped_arrays(reuse):
+    # the arrays are dropped while the kernels reading them are still queued
+    sums = [
+        sum(array.sum() for _ in range(10))
+        for _, array in prefetch_to_device(
+            _loads(20, [], size=2**22), depth=2, reuse=reuse, astype="float64"
+        )
+    ]
+    np.testing.assert_array_equal([float(s) for s in sums], [10 * 2**22 * i for i in range(20)])
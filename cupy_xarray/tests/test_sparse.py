@@ -0,0 +1,54 @@
+import cupy as cp
+import numpy as np
+import pytest
+import xarray as xr
+
+sparse = pytest.importorskip("sparse")
+
+
+@pytest.fixture
+def sparse_da():
+    dense = np.zeros((6, 8, 4))
+    dense[1, 2, 3] = 1.5
+    dense[4, 0, 1] = -2.0
+    dense[5, 7, 0] = 3.0
+    return xr.DataArray(sparse.COO.from_numpy(dense), dims=("z", "y", "x"), name="mask")
+
+
+def test_data_array_accessor_sparse(sparse_da):
+    gda = sparse_da.cupy.as_cupy()
+    assert gda.cupy.is_cupy
+    assert gda.cupy.device_nbytes == sparse_da.data.nbytes
+
+    host = gda.cupy.as_numpy()
+    assert isinstance(host.data, sparse.COO)
+    assert host.data.nnz == 3
+    np.testing.assert_array_equal(host.data.todense(), sparse_da.data.todense())
+
+    subset = gda.isel(z=slice(None, None, -2), y=2)
+    assert isinstance(subset.cupy.as_numpy().data, sparse.COO)
+    expected = sparse_da.data.todense()[::-2, 2]
+    np.testing.assert_array_equal(subset.cupy.as_numpy().data.todense(), expected)
+    assert isinstance(subset.data, cp.ndarray)
+    np.testing.assert_array_equal(subset.data.get(), expected)
+
+
+def test_data_array_accessor_sparse_dtype(sparse_da):
+    gda = sparse_da.cupy.as_cupy(dtype="float32")
+    assert gda.dtype == np.float32
+    host = gda.cupy.as_numpy(dtype="float64")
+    assert host.data.dtype == np.float64
+    assert host.data.nnz == 3
+
+
+def test_data_array_accessor_to_cupyx_sparse(sparse_da):
+    gda = sparse_da.isel(x=3).cupy.as_cupy()
+    matrix = gda.cupy.to_cupyx_sparse(format="csr")
+    assert matrix.format == "csr"
+    assert matrix.nnz == 1
+    np.testing.assert_array_equal(matrix.toarray().get(), sparse_da.isel(x=3).data.todense())
+
+    with pytest.raises(ValueError, match="two-dimensional"):
+        sparse_da.cupy.as_cupy().cupy.to_cupyx_sparse()
+    with pytest.raises(TypeError, match="requires sparse data"):
+        sparse_da.isel(x=3).copy(data=np.zeros((6, 8))).cupy.as_cupy().cupy.to_cupyx_sparse()
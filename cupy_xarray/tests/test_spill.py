@@ -0,0 +1,61 @@
+import cupy as cp
+import numpy as np
+import pytest
+import xarray as xr
+from xarray.core import indexing
+
+from cupy_xarray._spill import SpillableArray, SpillManager, spill_manager
+
+
+def test_spill_manager():
+    manager = SpillManager()
+    first = SpillableArray(cp.arange(100.0), manager=manager)
+    second = SpillableArray(cp.ones(50), manager=manager)
+    assert manager.device_bytes == 1200
+
+    assert manager.spill(800) == 800
+    assert first.spilled and not second.spilled
+    assert manager.spilled_bytes == 800
+
+    data = first[indexing.BasicIndexer((slice(None),))]
+    assert isinstance(data, cp.ndarray)
+    np.testing.assert_array_equal(data.get(), np.arange(100.0))
+    assert not first.spilled
+
+    # the access made ``first`` the most recently used array
+    manager.spill(1)
+    assert second.spilled and not first.spilled
+
+
+def test_data_array_accessor_managed():
+    da = xr.DataArray(np.arange(12.0).reshape(3, 4), dims=("y", "x"), name="v")
+    gda = da.cupy.as_cupy(managed=True)
+    assert gda.cupy.is_cupy
+
+    spill_manager().spill()
+    assert spill_manager().spilled_bytes >= da.nbytes
+    assert isinstance(gda.data, cp.ndarray)
+    np.testing.assert_array_equal(gda.cupy.as_numpy().values, da.values)
+
+    with pytest.raises(ValueError, match="cannot be combined"):
+        da.cupy.as_cupy(managed=True, cache=True)
+
+
+def test_spill_manager_allocator():
+    previous = cp.cuda.get_allocator()
+    manager = SpillManager()
+    try:
+        first = SpillableArray(cp.ones(10), manager=manager)
+        assert cp.cuda.get_allocator() == manager._malloc
+
+        # an allocator set afterwards is wrapped once the next array is registered
+        pool = cp.cuda.MemoryPool()
+        cp.cuda.set_allocator(pool.malloc)
+        second = SpillableArray(cp.ones(10), manager=manager)
+        assert cp.cuda.get_allocator() == manager._malloc
+
+        manager.uninstall()
+        assert cp.cuda.get_allocator() == pool.malloc
+        assert not first.spilled and not second.spilled
+    finally:
+        cp.cuda.set_allocator(previous)
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+import xarray as xr
+
+import cupy_xarray  # noqa: F401
+from cupy_xarray import telemetry
+
+
+@pytest.fixture
+def ds():
+    return xr.Dataset(
+        {
+            "a": (("y", "x"), np.ones((4, 8), dtype="float32")),
+            "b": (("y", "x"), np.zeros((4, 8), dtype="int16")),
+        }
+    )
+
+
+def test_record_eager(ds):
+    with telemetry.record(device_time=True) as log:
+        gda = ds.a.cupy.as_cupy()
+        gda.cupy.get()
+    (h2d, d2h) = log.transfers
+    assert h2d.direction == telemetry.HOST_TO_DEVICE
+    assert d2h.direction == telemetry.DEVICE_TO_HOST
+    assert h2d.name == d2h.name == "a"
+    assert h2d.nbytes == 4 * 8 * 4
+    assert h2d.dtype == np.float32
+    assert h2d.shape == (4, 8)
+    assert h2d.device_time is not None
+
+    gda.cupy.get()
+    assert len(log.transfers) == 2
+
+
+def test_record_dask_chunks(ds):
+    pytest.importorskip("dask")
+    with telemetry.record() as log:
+        ds.chunk(y=1).cupy.as_cupy().compute()
+    totals = log.totals
+    assert totals["a", telemetry.HOST_TO_DEVICE]["count"] == 4
+    assert totals["b", telemetry.HOST_TO_DEVICE]["nbytes"] == 4 * 8 * 2
+    assert all(transfer.device_time is None for transfer in log.transfers)
+
+
+def test_counters_top(ds):
+    counters = telemetry.register_hook(telemetry.TransferCounters())
+    try:
+        ds.cupy.as_cupy(streams=2)
+        ds.cupy.as_cupy(pack_threshold=1024)
+    finally:
+        telemetry.unregister_hook(counters)
+    ranked = [key for key, _ in counters.top()]
+    # the packed transfer is reported once for all variables, padding included
+    assert ranked == [
+        (("a", "b"), telemetry.HOST_TO_DEVICE),
+        ("a", telemetry.HOST_TO_DEVICE),
+        ("b", telemetry.HOST_TO_DEVICE),
+    ]
+    assert counters.totals["a", telemetry.HOST_TO_DEVICE]["count"] == 1
+
+    counters.reset()
+    assert counters.totals == {}
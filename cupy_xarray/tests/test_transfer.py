@@ -0,0 +1,184 @@
+import cupy as cp
+import numpy as np
+import pytest
+
+from cupy_xarray._transfer import (
+    HostBufferCache,
+    PinnedMemoryPool,
+    block_device,
+    is_device_array,
+    pack_to_device,
+    pack_to_host,
+    plan_cast,
+    side_streams,
+    to_device,
+    to_device_many,
+    to_host,
+    to_host_async,
+)
+
+
+def test_pinned_pool_reuses_buckets():
+    pool = PinnedMemoryPool(max_bytes=2**20)
+    buf = pool.acquire(5000)
+    assert buf.nbytes == 5000
+    pool.release(buf)
+    assert pool.cached_bytes == 8192
+
+    again = pool.acquire(6000)
+    assert pool.cached_bytes == 0
+    pool.release(again)
+    assert pool.cached_bytes == 8192
+
+
+def test_pinned_pool_evicts_lru():
+    pool = PinnedMemoryPool(max_bytes=3 * 4096)
+    bufs = [pool.acquire(4096) for _ in range(4)]
+    for buf in bufs:
+        pool.release(buf)
+    assert pool.cached_bytes == 3 * 4096
+
+    pool.clear()
+    assert pool.cached_bytes == 0
+
+
+def test_to_device_pinned():
+    arr = np.arange(24, dtype="float32").reshape(2, 3, 4)
+    garr = to_device(arr, pinned=True)
+    assert isinstance(garr, cp.ndarray)
+    np.testing.assert_array_equal(garr.get(), arr)
+
+    # non-contiguous input is packed into the staging buffer
+    garr = to_device(arr[:, ::2, ::-1], pinned=True)
+    np.testing.assert_array_equal(garr.get(), arr[:, ::2, ::-1])
+
+
+def test_to_device_many():
+    arrays = [np.full((i + 1, 3), i, dtype="float64") for i in range(7)]
+    arrays.append(np.empty((0,), dtype="int32"))
+    garrs = to_device_many(arrays, 3)
+    assert len(garrs) == len(arrays)
+    for garr, arr in zip(garrs, arrays, strict=True):
+        assert isinstance(garr, cp.ndarray)
+        np.testing.assert_array_equal(garr.get(), arr)
+
+    # the streams are kept for later calls
+    streams = side_streams(3)
+    to_device_many(arrays, 2)
+    assert side_streams(3) == streams
+
+
+def test_pack_round_trip():
+    arrays = [
+        np.array(3.5),
+        np.arange(5, dtype="int16"),
+        np.arange(12, dtype="float32").reshape(3, 4).T,
+        np.empty((0, 2), dtype="int64"),
+        np.array([True, False, True]),
+    ]
+    garrs = pack_to_device(arrays)
+    for garr, arr in zip(garrs, arrays, strict=True):
+        assert garr.dtype == arr.dtype
+        assert garr.shape == arr.shape
+        np.testing.assert_array_equal(garr.get(), arr)
+
+    host = pack_to_host(garrs)
+    for harr, arr in zip(host, arrays, strict=True):
+        assert isinstance(harr, np.ndarray)
+        np.testing.assert_array_equal(harr, arr)
+
+
+class CAIProducer:
+    def __init__(self, array):
+        self.array = array
+
+    @property
+    def __cuda_array_interface__(self):
+        return self.array.__cuda_array_interface__
+
+
+class DLPackProducer:
+    def __init__(self, array):
+        self.array = array
+
+    def __dlpack__(self, **kwargs):
+        return self.array.__dlpack__(**kwargs)
+
+    def __dlpack_device__(self):
+        return self.array.__dlpack_device__()
+
+
+@pytest.mark.parametrize("producer", [CAIProducer, DLPackProducer])
+def test_to_device_foreign_zero_copy(producer):
+    garr = cp.arange(10, dtype="float32")
+    foreign = producer(garr)
+    assert is_device_array(foreign)
+
+    wrapped = to_device(foreign)
+    assert isinstance(wrapped, cp.ndarray)
+    assert wrapped.data.ptr == garr.data.ptr
+
+
+def test_is_device_array_host():
+    arr = np.arange(3)
+    assert not is_device_array(arr)
+    assert not is_device_array(DLPackProducer(arr))
+
+
+def test_block_device():
+    devices = (0, 1, 2)
+    assert [block_device("round-robin", devices, (0, i), (1, 4)) for i in range(4)] == [0, 1, 2, 0]
+    assert [block_device(1, devices, (i, 1), (4, 4)) for i in range(4)] == [1, 1, 1, 1]
+    assert [block_device(0, devices, (i, 1), (4, 4)) for i in range(4)] == [0, 1, 2, 0]
+    assert block_device(lambda loc: sum(loc), devices, (2, 3), (4, 4)) == 5
+    assert block_device("round-robin", devices, (), ()) == 0
+
+
+def test_host_buffer_cache():
+    cache = HostBufferCache(max_bytes=2 * 80)
+    buf = cache.get((10,), "float64")
+    assert buf.shape == (10,)
+    assert buf.dtype == np.float64
+    assert cache.get((10,), "float64") is buf
+
+    cache.get((10,), "int64")
+    cache.get((5, 2), "float64")
+    assert cache.cached_bytes == 2 * 80
+    assert cache.get((10,), "float64") is not buf
+
+
+def test_to_host_out():
+    garr = cp.arange(12, dtype="float32").reshape(3, 4)
+    out = np.empty((3, 4), dtype="float32")
+    assert to_host(garr, out=out) is out
+    np.testing.assert_array_equal(out, garr.get())
+
+    first = to_host(garr, reuse=True)
+    assert to_host(garr + 1, reuse=True) is first
+    np.testing.assert_array_equal(first, garr.get() + 1)
+
+
+def test_to_host_async():
+    garr = cp.arange(12, dtype="float64").reshape(3, 4)
+    out = np.empty((3, 4), dtype="float64")
+    assert to_host_async(garr * 2, out=out).result() is out
+    np.testing.assert_array_equal(out, garr.get() * 2)
+
+    host = to_host_async(garr.T, astype="float32").result()
+    assert host.dtype == np.float32
+    np.testing.assert_array_equal(host, garr.get().T)
+
+    host = to_host_async(garr[:, ::2], astype="complex128").result()
+    assert host.dtype == np.complex128
+    np.testing.assert_array_equal(host, garr.get()[:, ::2])
+
+
+def test_plan_cast():
+    f8, f4 = np.dtype("float64"), np.dtype("float32")
+    assert plan_cast(f8, None) == (f8, None)
+    assert plan_cast(f8, f8) == (f8, None)
+    assert plan_cast(f8, f4) == (f4, None)
+    assert plan_cast(f4, f8) == (f4, f8)
+    assert plan_cast(f8, f4, cast="device") == (f8, f4)
+    assert plan_cast(f4, f8, cast="host") == (f8, None)
+    assert plan_cast(f4, f8, sender="device") == (f4, f8)